@@ -0,0 +1,211 @@
+"""Benchmarks ioutils storage at synthetic scale.
+
+For each storage backend and guild count, this generates a synthetic data file, then measures
+loading it, read_json, write_json, write_json_entry and initialize_from_json (with a stub bot that makes no requests),
+recording latency, throughput and peak memory. The results are printed and written to a JSON report.
+
+Usage (from the repository root):
+    python benchmarks/storage_benchmark.py --guilds 10 1000 --entries 100 --output benchmark_report.json
+"""
+import argparse, asyncio, contextlib, io, json, os, random, statistics, sys, tempfile, time, tracemalloc
+
+import discord
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ioutils
+from cogfiles.birthdays import Birthday
+from cogfiles.reaction_roles import ReactionRole
+from cogfiles.reminders import Reminder
+
+
+BACKENDS = ["json", "journal", "sharded", "sqlite"]
+COLLECTIONS = {"reminders": Reminder, "birthdays": Birthday, "reaction_roles": ReactionRole}
+SETTING_KEYS = ["periodic_announcement_channel_id", "birthday_channel_id", "daily_message_channel_id", "scheduled_event_alert_channel_id", "new_threads_channel_id", "copypasta"]
+
+
+class StubGuild:
+    """Stands in for a discord.Guild, with every role present."""
+
+    def __init__(self, id: int):
+        self.id = id
+
+    def get_role(self, role_id: int) -> discord.Object:
+        return discord.Object(role_id)
+
+class StubChannel:
+    """Stands in for a discord.TextChannel, handing out partial messages without any requests."""
+
+    def __init__(self, id: int, guild: StubGuild):
+        self.id = id
+        self.guild = guild
+
+    def get_partial_message(self, message_id: int) -> discord.Object:
+        return discord.Object(message_id)
+
+class StubBot:
+    """Stands in for a commands.Bot whose gateway cache holds every channel and user, so hydration makes no requests."""
+
+    def __init__(self, guild_ids: list[int]):
+        self.guilds = [StubGuild(guild_id) for guild_id in guild_ids]
+        self._stub_guild = StubGuild(0)
+
+    def get_channel(self, channel_id: int) -> StubChannel:
+        return StubChannel(channel_id, self._stub_guild)
+
+    def get_user(self, user_id: int) -> discord.Object:
+        return discord.Object(user_id)
+
+
+def generate_document(guild_count: int, entries_per_collection: int) -> dict:
+    """Generates a data document with the given number of guilds, each with the given number of reminders, birthdays and reaction roles."""
+    now = time.time()
+    next_id = iter(range(10**17, 10**18))
+    document = {}
+    for guild_id in range(1, guild_count + 1):
+        guild = {key: next(next_id) for key in SETTING_KEYS if key != "copypasta"}
+        guild["copypasta"] = random.random() < 0.5
+        guild["reminders"] = [synthetic_reminder(next(next_id), now) for _ in range(entries_per_collection)]
+        guild["birthdays"] = [{"user_id": next(next_id), "date": f"{random.randint(1970, 2010)}-{random.randint(1, 12):02}-{random.randint(1, 28):02}"} for _ in range(entries_per_collection)]
+        guild["reaction_roles"] = [{"message_id": next(next_id), "channel_id": next(next_id), "role_id": next(next_id), "emoji": "👍"} for _ in range(entries_per_collection)]
+        document[str(guild_id)] = guild
+    return document
+
+def synthetic_reminder(id: int, now: float) -> dict:
+    """Generates the JSON for a reminder set through a slash command."""
+    return {
+        "id": id,
+        "author_id": random.randrange(10**17, 10**18),
+        "channel_id": random.randrange(10**17, 10**18),
+        "command_message_id": -1,
+        "original_message_timestamp": now,
+        "reminder_timestamp": now + random.randint(60, 60*60*24*365),
+        "reminder_str": "Synthetic reminder " * random.randint(1, 5),
+        "slash_message_id": id,
+        "subscriber_ids": [random.randrange(10**17, 10**18) for _ in range(random.randint(0, 3))]
+    }
+
+def configure_storage(backend: str, directory: str):
+    """Points ioutils at a fresh data file in the given directory, using the given backend."""
+    ioutils.flush()
+    ioutils.DATA_BACKEND = backend
+    ioutils.DATA_FILE = os.path.join(directory, "data.json")
+    ioutils.DATA_DIR = directory
+    ioutils.DATABASE_FILE = os.path.join(directory, "data.db")
+    ioutils.DATA_WRITE_DELAY = 0
+    ioutils._backend = None
+    ioutils._document = None
+
+def summarize(latencies: list[float]) -> dict[str, float]:
+    """Summarizes a list of latencies (in seconds) as milliseconds, plus the throughput in operations per second."""
+    percentiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "count": len(latencies),
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentiles[49] * 1000,
+        "p95_ms": percentiles[94] * 1000,
+        "max_ms": max(latencies) * 1000,
+        "ops_per_second": len(latencies) / sum(latencies) if sum(latencies) > 0 else float("inf")
+    }
+
+def measure(function, *args) -> tuple[any, float, int]:
+    """Runs a function, returning its result, how many seconds it took, and its peak memory allocation in bytes."""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = function(*args)
+    elapsed_time = time.perf_counter() - start_time
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed_time, peak_memory
+
+def benchmark(backend: str, guild_count: int, entries_per_collection: int, operations: int) -> dict:
+    """Runs every measurement for one backend at one scale."""
+    with tempfile.TemporaryDirectory() as directory:
+        document = generate_document(guild_count, entries_per_collection)
+        with open(os.path.join(directory, "data.json"), "w") as file:
+            json.dump(document, file, indent=2)
+        del document
+
+        # Create the backend once so that any migration from the JSON data file is not counted as loading
+        configure_storage(backend, directory)
+        with contextlib.redirect_stdout(io.StringIO()):
+            ioutils.load_document()
+        configure_storage(backend, directory)
+
+        result = {"backend": backend, "guilds": guild_count, "entries_per_collection": entries_per_collection}
+        _, load_time, load_memory = measure(ioutils.load_document)
+        result["load"] = {"seconds": load_time, "peak_memory_bytes": load_memory}
+
+        guild_ids = list(range(1, guild_count + 1))
+        keys = SETTING_KEYS + list(COLLECTIONS)
+        read_latencies = []
+        for _ in range(operations):
+            path = (random.choice(guild_ids), random.choice(keys))
+            start_time = time.perf_counter()
+            ioutils.read_json(*path)
+            read_latencies.append(time.perf_counter() - start_time)
+        result["read_json"] = summarize(read_latencies)
+
+        write_latencies = []
+        for _ in range(operations):
+            guild_id, key = random.choice(guild_ids), random.choice(SETTING_KEYS[:-1])
+            start_time = time.perf_counter()
+            ioutils.write_json(guild_id, key, value=random.randrange(10**17, 10**18))
+            write_latencies.append(time.perf_counter() - start_time)
+        result["write_json"] = summarize(write_latencies)
+
+        entry_latencies = []
+        for _ in range(operations):
+            reminder = synthetic_reminder(random.randrange(10**17, 10**18), time.time())
+            guild_id = random.choice(guild_ids)
+            start_time = time.perf_counter()
+            ioutils.write_json_entry(guild_id, "reminders", id=reminder["id"], value=reminder)
+            entry_latencies.append(time.perf_counter() - start_time)
+        result["write_json_entry"] = summarize(entry_latencies)
+        ioutils.flush()
+
+        bot = StubBot(guild_ids)
+        result["initialize_from_json"] = {}
+        for key, settings_class in COLLECTIONS.items():
+            guild_settings = {}
+            with contextlib.redirect_stdout(io.StringIO()):
+                _, initialize_time, initialize_memory = measure(asyncio.run, ioutils.initialize_from_json(bot, settings_class, guild_settings, key))
+            count = sum(len(settings) for settings in guild_settings.values())
+            result["initialize_from_json"][key] = {
+                "objects": count,
+                "seconds": initialize_time,
+                "objects_per_second": count / initialize_time if initialize_time > 0 else float("inf"),
+                "peak_memory_bytes": initialize_memory
+            }
+
+        configure_storage(backend, directory) # Close out the backend before its directory is removed
+        return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ioutils storage backends at synthetic scale.")
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=BACKENDS, help="Storage backends to benchmark")
+    parser.add_argument("--guilds", nargs="+", type=int, default=[10, 1000], help="Guild counts to benchmark (e.g. 10 1000 10000)")
+    parser.add_argument("--entries", type=int, default=100, help="Reminders, birthdays and reaction roles per guild")
+    parser.add_argument("--operations", type=int, default=200, help="Reads and writes to time at each scale")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the synthetic data")
+    parser.add_argument("--output", default="benchmark_report.json", help="Path to write the JSON report to")
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    results = []
+    for guild_count in args.guilds:
+        for backend in args.backends:
+            result = benchmark(backend, guild_count, args.entries, args.operations)
+            results.append(result)
+            print(f"{backend:>8} | {guild_count:>6} guilds | load {result['load']['seconds']:.3f}s"
+                  f" | read p50 {result['read_json']['p50_ms']:.4f}ms"
+                  f" | write p50 {result['write_json']['p50_ms']:.3f}ms"
+                  f" | entry p50 {result['write_json_entry']['p50_ms']:.3f}ms"
+                  f" | reminders init {result['initialize_from_json']['reminders']['seconds']:.3f}s")
+
+    report = {"python": sys.version, "arguments": vars(args), "results": results}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote report to {args.output}")
+
+if __name__ == "__main__":
+    main()
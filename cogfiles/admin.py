@@ -1,9 +1,12 @@
+import dataclasses
 import discord
 
+from dataclasses import dataclass
 from discord import app_commands
 from discord.ext import commands
 from enum import Enum
 from ioutils import read_json, write_json
+from resolver import resolve_channel
 
 
 class ChannelType(Enum):
@@ -21,6 +24,39 @@ CHANNEL_TYPE_TO_DATABASE_STR = {
     ChannelType.NewThreads: "new_threads_channel_id"
 }
 
+@dataclass
+class GuildSettings:
+    """The settings saved for a server, loaded from the JSON data once and then kept in memory.
+    Each field name matches the key the setting is saved under (see CHANNEL_TYPE_TO_DATABASE_STR)."""
+    guild_id: int
+    periodic_announcement_channel_id: int | None = None
+    birthday_channel_id: int | None = None
+    daily_message_channel_id: int | None = None
+    scheduled_event_alert_channel_id: int | None = None
+    new_threads_channel_id: int | None = None
+    copypasta: bool = False
+
+    def channel_id(self, channel_type: ChannelType) -> int | None:
+        """Returns the ID of the channel set for the given channel type, or None if it has not been set."""
+        return getattr(self, CHANNEL_TYPE_TO_DATABASE_STR[channel_type])
+
+    def set(self, bot: commands.Bot, key: str, value: any):
+        """Changes a setting and saves it. Dispatches a guild_settings_update event with the settings, key, old value and new value,
+        which cogs can listen for with on_guild_settings_update."""
+        old_value = getattr(self, key)
+        setattr(self, key, value)
+        write_json(self.guild_id, key, value=value)
+        bot.dispatch("guild_settings_update", self, key, old_value, value)
+
+_guild_settings: dict[int, GuildSettings] = {}
+
+def get_guild_settings(guild_id: int) -> GuildSettings:
+    """Returns the settings for a server, loading them the first time they are needed."""
+    if guild_id not in _guild_settings:
+        saved_settings = {field.name: read_json(guild_id, field.name) for field in dataclasses.fields(GuildSettings) if field.name != "guild_id"}
+        _guild_settings[guild_id] = GuildSettings(guild_id, **{key: value for key, value in saved_settings.items() if value is not None})
+    return _guild_settings[guild_id]
+
 class Admin(commands.Cog, name="Administrator"):
     """Save settings for your server."""
 
@@ -62,7 +98,7 @@ class Admin(commands.Cog, name="Administrator"):
         """Set which channel to send certain automated messages (announcements, birthdays, daily messages, events, new threads, etc)."""
         if channel_type != ChannelType.Events and isinstance(channel, discord.ForumChannel):
             return await interaction.response.send_message("Forum channels are only possible when setting the Events channel.", ephemeral=True)
-        write_json(interaction.guild.id, CHANNEL_TYPE_TO_DATABASE_STR[channel_type], value=channel.id)
+        get_guild_settings(interaction.guild.id).set(self.bot, CHANNEL_TYPE_TO_DATABASE_STR[channel_type], channel.id)
         await interaction.response.send_message(f"{channel_type.value} will be sent in {channel.mention}", ephemeral=True)
 
     @channel.error
@@ -77,9 +113,9 @@ class Admin(commands.Cog, name="Administrator"):
         if not isinstance(thread.parent, discord.ForumChannel) or thread.is_private():
             return
 
-        new_thread_channel_id = read_json(thread.guild.id, "new_threads_channel_id")
+        new_thread_channel_id = get_guild_settings(thread.guild.id).new_threads_channel_id
         if new_thread_channel_id is None:
             return
 
-        new_thread_channel = await self.bot.fetch_channel(new_thread_channel_id)
+        new_thread_channel = await resolve_channel(self.bot, new_thread_channel_id)
         await new_thread_channel.send(f"{thread.owner.mention} has created a new thread in {thread.parent.mention}: {thread.mention}")
\ No newline at end of file
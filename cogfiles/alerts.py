@@ -1,7 +1,8 @@
-from ioutils import read_json, write_json
-import discord, datetime
+from cogfiles.admin import get_guild_settings
+from resolver import resolve_channel, resolve_member
+import asyncio, discord, datetime, heapq, time
 from discord import app_commands
-from discord.ext import commands, tasks
+from discord.ext import commands
 from discord.utils import format_dt
 
 
@@ -14,17 +15,29 @@ class EventAlerts(commands.GroupCog, group_name="eventalerts"):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.yet_to_ping: set[discord.ScheduledEvent] = set() # Events that have not yet been pinged, to avoid double pings
-        self.wait_until_announcement_tasks: dict[discord.ScheduledEvent, tasks.Loop] = {}
+        self.scheduled_events: dict[int, discord.ScheduledEvent] = {} # Event ID to every event in the bot's servers, kept up to date from gateway events
+        self.yet_to_ping: set[int] = set() # IDs of events that have not yet been pinged, to avoid double pings
+        self.yet_to_ping_by_creator: dict[tuple[int, int], set[int]] = {} # (Guild ID, creator ID) to the IDs of their events that have not yet been pinged
+        self.announcement_times: dict[int, float] = {} # Event ID to the timestamp at which to check whether to announce that the event is starting
+        self._announcement_heap: list[tuple[float, int]] = [] # (timestamp, event ID) for every scheduled announcement, earliest first
+        self._announcement_heap_changed = asyncio.Event() # Wakes the scheduler when an announcement is scheduled earlier than it was waiting for
+        self._scheduler: asyncio.Task | None = None
+        self.ping_roles: dict[int, list[tuple[str, discord.Role]]] = {} # Guild ID to its "Ping" roles and their keywords, from the top of the role list down
+        self.forum_threads: dict[int, dict[str, discord.Thread]] = {} # Forum channel ID to its threads, keyed by lowercase name
     
     @commands.Cog.listener()
     async def on_ready(self):
-        """Initializes the list of events in memory and creates task loops for each announcement not already pinged."""
+        """Initializes the list of events in memory and schedules an announcement for each event not already pinged.
+        The events are taken from the gateway's cache, so no requests are needed."""
         for guild in self.bot.guilds:
-            for event in await guild.fetch_scheduled_events():
-                if event.status == discord.EventStatus.scheduled:
-                    await self.create_wait_until_announcement_task(event)
-                    self.yet_to_ping.add(event)
+            for event in guild.scheduled_events:
+                self.scheduled_events[event.id] = event
+                # Events that match no role are never announced, so there is nothing to schedule for them
+                if event.status == discord.EventStatus.scheduled and self.get_role_from_event(event) is not None:
+                    self.add_yet_to_ping(event)
+                    self.schedule_announcement(event)
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = asyncio.create_task(self.send_announcements())
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
@@ -34,52 +47,109 @@ class EventAlerts(commands.GroupCog, group_name="eventalerts"):
     @commands.Cog.listener()
     async def on_scheduled_event_create(self, event: discord.ScheduledEvent):
         """Send a ping message when an event tied to a role is created."""
+        self.scheduled_events[event.id] = event
         await self.send_event_start_time_message(event)
 
     @commands.Cog.listener()
     async def on_scheduled_event_update(self, before: discord.ScheduledEvent, after: discord.ScheduledEvent):
         """Updates the status of the event in memory when an event tied to a role is updated."""
+        self.scheduled_events[after.id] = after
         if before.status != after.status and after.status != discord.EventStatus.scheduled: # Event is no longer scheduled
-            self.cancel_wait_until_announcement_task(before)
-            self.yet_to_ping.remove(before)
+            self.discard_yet_to_ping(before)
         elif before.start_time != after.start_time: # Event has been rescheduled
             await self.send_event_start_time_message(after, rescheduling=True)
+
+    @commands.Cog.listener()
+    async def on_scheduled_event_delete(self, event: discord.ScheduledEvent):
+        """Removes a deleted event from memory."""
+        self.scheduled_events.pop(event.id, None)
+        self.discard_yet_to_ping(event)
     
     async def send_event_start_time_message(self, event: discord.ScheduledEvent, *, rescheduling: bool = False):
         """Attempts to send a message about the event start time. 
         Runs whenever an event is created or rescheduled. 
         Does nothing if no matching role is found for this event."""
-        role = EventAlerts.get_role_from_event(event)
+        role = self.get_role_from_event(event)
         if role is None:
             return
         
-        channel = await event.guild.fetch_channel(read_json(event.guild.id, "scheduled_event_alert_channel_id"))
+        channel = await resolve_channel(self.bot, get_guild_settings(event.guild.id).scheduled_event_alert_channel_id)
         # If the server has its event alerts channel set to a forum, then the forum should have a thread with a name matching the role
         if isinstance(channel, discord.ForumChannel):
-            channel = EventAlerts.get_channel_from_role(channel, role)
-        await channel.send(f"{event.name} {'has been rescheduled to' if rescheduling else 'is set for'} {format_dt(event.start_time, style='F')}! {role.mention}\n{event.url}")
+            channel = self.get_channel_from_role(channel, role)
+        if channel is None:
+            print(f"Could not find a channel to send the alert for {event.name} in.")
+        else:
+            await channel.send(f"{event.name} {'has been rescheduled to' if rescheduling else 'is set for'} {format_dt(event.start_time, style='F')}! {role.mention}\n{event.url}")
+
+        self.add_yet_to_ping(event)
+        self.schedule_announcement(event)
+
+    def add_yet_to_ping(self, event: discord.ScheduledEvent):
+        """Records that an event has not yet been pinged, indexed by its creator so that their voice joins can find it directly."""
+        self.yet_to_ping.add(event.id)
+        if event.creator_id is not None:
+            self.yet_to_ping_by_creator.setdefault((event.guild.id, event.creator_id), set()).add(event.id)
 
-        await self.create_wait_until_announcement_task(event)
-        self.yet_to_ping.add(event)
+    def discard_yet_to_ping(self, event: discord.ScheduledEvent):
+        """Records that an event no longer needs to be pinged, if it still did, and cancels its scheduled announcement."""
+        self.announcement_times.pop(event.id, None) # The announcement is left in the heap, and skipped once it reaches the front of it
+        if event.id not in self.yet_to_ping:
+            return
+        self.yet_to_ping.discard(event.id)
+        if event.creator_id is None:
+            return
+        creator_key = (event.guild.id, event.creator_id)
+        event_ids = self.yet_to_ping_by_creator.get(creator_key, set())
+        event_ids.discard(event.id)
+        if len(event_ids) == 0:
+            self.yet_to_ping_by_creator.pop(creator_key, None)
     
-    async def create_wait_until_announcement_task(self, event: discord.ScheduledEvent):
-        """Creates a task loop that completes when the event creator joins a voice channel 30 minutes or less before the event start time."""
-        event = await event.guild.fetch_scheduled_event(event.id)
-        if event in self.wait_until_announcement_tasks:
-            self.cancel_wait_until_announcement_task(event)
-
-        @tasks.loop(time=(event.start_time - datetime.timedelta(minutes=MINUTES_BEFORE_EVENT_START_TIME)).timetz())
-        async def wait_until_announcement():
-            """Loops until the event creator joins a voice channel, then sends a starting message."""  
-            if datetime.datetime.now(event.start_time.tzinfo).date() == event.start_time.date():
-                event_creator = await event.guild.fetch_member(event.creator.id)
-                if isinstance(event_creator, discord.Member) and event_creator.voice is not None:
-                    await self.send_event_is_starting_message(event)
-                    self.cancel_wait_until_announcement_task(event)
-        
-        self.wait_until_announcement_tasks[event] = wait_until_announcement
-        self.wait_until_announcement_tasks[event].start()
+    def schedule_announcement(self, event: discord.ScheduledEvent):
+        """Schedules a check, 30 minutes before the event start time, of whether the event creator is already in a voice channel.
+        If the event already had an announcement scheduled, it is moved to the new time."""
+        announcement_time = (event.start_time - datetime.timedelta(minutes=MINUTES_BEFORE_EVENT_START_TIME)).timestamp()
+        self.announcement_times[event.id] = announcement_time
+        heapq.heappush(self._announcement_heap, (announcement_time, event.id))
+        if self._announcement_heap[0] == (announcement_time, event.id):
+            self._announcement_heap_changed.set()
+
+    async def send_announcements(self):
+        """Sends an event starting message for each event whose creator is in a voice channel once its announcement time arrives.
+        Sleeps until the earliest scheduled announcement, waking early if an earlier one is scheduled.
+        Events whose creator is not in a voice channel yet are announced when they join one instead (see on_voice_state_update)."""
+        while True:
+            self._announcement_heap_changed.clear()
+            while len(self._announcement_heap) > 0:
+                announcement_time, event_id = self._announcement_heap[0]
+                if self.announcement_times.get(event_id) != announcement_time: # This announcement was cancelled or rescheduled
+                    heapq.heappop(self._announcement_heap)
+                elif announcement_time <= time.time():
+                    heapq.heappop(self._announcement_heap)
+                    del self.announcement_times[event_id]
+                    # This task announces every event, so a problem with one event must not stop it
+                    try:
+                        await self.announce_if_creator_in_voice(event_id)
+                    except Exception as error:
+                        print(f"Failed to announce that event {event_id} is starting: {error!r}")
+                else:
+                    break
+
+            time_until_next_announcement = None if len(self._announcement_heap) == 0 else self._announcement_heap[0][0] - time.time()
+            try:
+                await asyncio.wait_for(self._announcement_heap_changed.wait(), timeout=time_until_next_announcement)
+            except asyncio.TimeoutError:
+                pass
     
+    async def announce_if_creator_in_voice(self, event_id: int):
+        """Sends an event starting message if the event's creator is already in a voice channel."""
+        event = self.scheduled_events.get(event_id)
+        if event is None: # The event was deleted while its announcement was waiting
+            return
+        event_creator = None if event.creator_id is None else await resolve_member(event.guild, event.creator_id)
+        if isinstance(event_creator, discord.Member) and event_creator.voice is not None:
+            await self.send_event_is_starting_message(event)
+
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
         """Sends an event starting message when an event creator joins a voice channel 30 minutes or less before the event start time."""
@@ -87,74 +157,139 @@ class EventAlerts(commands.GroupCog, group_name="eventalerts"):
         if not is_joining_voice_channel:
             return
         
-        for event in self.yet_to_ping.copy():
-            event = await event.guild.fetch_scheduled_event(event.id)
-            event_creator = await EventAlerts.get_event_creator(event)
-            if event_creator.id == member.id:
+        # Only the events this member created are looked at, so voice joins by anyone else cost a single lookup
+        for event_id in list(self.yet_to_ping_by_creator.get((member.guild.id, member.id), ())):
+            event = self.scheduled_events.get(event_id)
+            if event is not None:
                 await self.send_event_is_starting_message(event)
     
     async def send_event_is_starting_message(self, event: discord.ScheduledEvent):
         """Attempts to send a message that the event is starting. 
         Does nothing if the event start time is more than 30 minutes away."""
-        role = EventAlerts.get_role_from_event(event)
+        role = self.get_role_from_event(event)
+        if role is None: # The event was edited so that it no longer matches any role
+            self.discard_yet_to_ping(event)
+            return
         time_until_event_start = event.start_time - datetime.datetime.now(event.start_time.tzinfo)
         
         if time_until_event_start <= datetime.timedelta(minutes=MINUTES_BEFORE_EVENT_START_TIME):
-            channel = await event.guild.fetch_channel(read_json(event.guild.id, "scheduled_event_alert_channel_id"))
+            channel = await resolve_channel(self.bot, get_guild_settings(event.guild.id).scheduled_event_alert_channel_id)
             # If the server has its event alerts channel set to a forum, then the forum should have a thread with a name matching the role
             if isinstance(channel, discord.ForumChannel):
-                channel = EventAlerts.get_channel_from_role(channel, role)
+                channel = self.get_channel_from_role(channel, role)
+            if channel is None:
+                print(f"Could not find a channel to announce that {event.name} is starting in.")
+                return
             await channel.send(f"{event.name} is starting {format_dt(event.start_time, style='R')}! {role.mention}\n{event.url}")
-            self.yet_to_ping.discard(event)
-    
-    def cancel_wait_until_announcement_task(self, event: discord.ScheduledEvent):
-        """Stop the task loop that would send an announcement for this event and clear the event from memory."""
-        if event in self.wait_until_announcement_tasks:
-            self.wait_until_announcement_tasks[event].cancel()
-            del self.wait_until_announcement_tasks[event]
-            
-    @staticmethod
-    async def get_event_creator(event: discord.ScheduledEvent):
-        """Returns the creator of the given event."""
-        fetched_event = await event.guild.fetch_scheduled_event(event.id)
-        return await fetched_event.guild.fetch_member(fetched_event.creator.id)
-
-    @staticmethod
-    def get_role_from_event(event: discord.ScheduledEvent) -> discord.Role:
-        """Returns the role that should be pinged for a given event. Returns None if no role found."""
-        # For some reason, event.guild.roles iterates through the roles from the bottom of the list to the top.
-        # We want to look through the roles list starting from the top (i.e. starting from "Witch of Storycasting"),
-        # so we reverse the event.guild.roles iterator here to do so.
-        for role in reversed(event.guild.roles):
-            if EventAlerts.matches_role(role, event=event):                
+            self.discard_yet_to_ping(event)
+
+    def get_ping_roles(self, guild: discord.Guild) -> list[tuple[str, discord.Role]]:
+        """Returns the guild's "Ping" roles along with their keywords, in the order they should be matched in.
+        The roles are indexed the first time they are needed, and reindexed whenever a "Ping" role changes."""
+        if guild.id not in self.ping_roles:
+            # For some reason, guild.roles iterates through the roles from the bottom of the list to the top.
+            # We want to look through the roles list starting from the top (i.e. starting from "Witch of Storycasting"),
+            # so we reverse the guild.roles iterator here to do so.
+            self.ping_roles[guild.id] = [(keyword, role) for role in reversed(guild.roles) if (keyword := ping_role_keyword(role)) is not None]
+        return self.ping_roles[guild.id]
+
+    def get_forum_threads(self, forum: discord.ForumChannel) -> dict[str, discord.Thread]:
+        """Returns the forum's threads keyed by lowercase name.
+        The threads are indexed the first time they are needed, and kept up to date as threads are created, renamed and deleted."""
+        if forum.id not in self.forum_threads:
+            self.forum_threads[forum.id] = {}
+            for thread in forum.threads:
+                self.forum_threads[forum.id].setdefault(thread.name.lower(), thread)
+        return self.forum_threads[forum.id]
+
+    def get_role_from_event(self, event: discord.ScheduledEvent) -> discord.Role:
+        """Returns the role that should be pinged for a given event, by checking if the role's name minus the word "Ping" is contained in the event. 
+        Returns None if no role found."""
+        string_to_check = (event.name + (event.description or "")).lower()
+        for keyword, role in self.get_ping_roles(event.guild):
+            if keyword in string_to_check:
                 return role
         return None
 
-    @staticmethod
-    def get_channel_from_role(channel: discord.TextChannel | discord.ForumChannel, role: discord.Role) -> discord.TextChannel | discord.Thread:
+    def get_channel_from_role(self, channel: discord.TextChannel | discord.ForumChannel, role: discord.Role) -> discord.TextChannel | discord.Thread:
         """Returns the channel/thread that matches the given role.  
-        If a forum channel is given, this function checks every thread inside of the forum. 
+        If a forum channel is given, this function looks for a thread named after the role, then for a thread whose name contains it. 
         Returns None if no channel/thread found."""
+        keyword = ping_role_keyword(role)
+        if keyword is None:
+            return None
         if isinstance(channel, discord.ForumChannel):
-            for thread in channel.threads:
-                if EventAlerts.matches_role(role, channel=thread):
+            threads = self.get_forum_threads(channel)
+            if keyword in threads:
+                return threads[keyword]
+            for name, thread in threads.items():
+                if keyword in name:
                     return thread
-        else:
-            if EventAlerts.matches_role(role, channel=channel):
-                return channel
+        elif keyword in channel.name.lower():
+            return channel
         return None
 
-    @staticmethod
-    def matches_role(role: discord.Role, event: discord.ScheduledEvent = None, channel: discord.TextChannel | discord.Thread = None) -> bool:
-        """Determines if an event or channel matches a given role, by checking if the role's name minus the word "Ping" is contained in the event/channel."""
-        if " ping" not in role.name.lower():
-            return False
-        
-        if channel is not None:
-            string_to_check = channel.name
-        elif event is not None:
-            string_to_check = event.name + event.description
-        else:
-            return False
-        
-        return role.name.lower().replace(" ping", "") in string_to_check.lower()
\ No newline at end of file
+    @commands.Cog.listener()
+    async def on_guild_role_create(self, role: discord.Role):
+        """Reindexes the guild's "Ping" roles when one is created."""
+        if ping_role_keyword(role) is not None:
+            self.ping_roles.pop(role.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        """Reindexes the guild's "Ping" roles when one is renamed or moved."""
+        if ping_role_keyword(before) is not None or ping_role_keyword(after) is not None:
+            self.ping_roles.pop(after.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        """Reindexes the guild's "Ping" roles when one is deleted."""
+        if ping_role_keyword(role) is not None:
+            self.ping_roles.pop(role.guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_thread_create(self, thread: discord.Thread):
+        """Adds a new thread to its forum's index."""
+        if thread.parent_id in self.forum_threads:
+            self.forum_threads[thread.parent_id].setdefault(thread.name.lower(), thread)
+
+    @commands.Cog.listener()
+    async def on_thread_join(self, thread: discord.Thread):
+        """Reindexes a thread's forum when the thread becomes visible to the bot again, such as when it is unarchived.
+        The forum is reindexed from its threads the next time it is needed."""
+        self.forum_threads.pop(thread.parent_id, None)
+
+    @commands.Cog.listener()
+    async def on_thread_remove(self, thread: discord.Thread):
+        """Reindexes a thread's forum when the thread is no longer visible to the bot, such as when it is archived."""
+        self.forum_threads.pop(thread.parent_id, None)
+
+    @commands.Cog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        """Updates a renamed thread in its forum's index, and reindexes its forum when it is archived or unarchived."""
+        if before.archived != after.archived:
+            self.forum_threads.pop(after.parent_id, None)
+        elif after.parent_id in self.forum_threads and before.name != after.name:
+            self.remove_forum_thread(after.parent_id, after.id)
+            self.forum_threads[after.parent_id].setdefault(after.name.lower(), after)
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        """Removes a deleted thread from its forum's index."""
+        if payload.parent_id in self.forum_threads:
+            self.remove_forum_thread(payload.parent_id, payload.thread_id)
+
+    def remove_forum_thread(self, forum_id: int, thread_id: int):
+        """Removes a thread from its forum's index, if it is there."""
+        threads = self.forum_threads[forum_id]
+        for name, thread in threads.items():
+            if thread.id == thread_id:
+                del threads[name]
+                return
+
+def ping_role_keyword(role: discord.Role) -> str | None:
+    """Returns the lowercase name of a "Ping" role minus the word "Ping", which events and threads are matched against.
+    Returns None if the role is not a "Ping" role."""
+    if " ping" not in role.name.lower():
+        return None
+    return role.name.lower().replace(" ping", "")
@@ -1,6 +1,7 @@
 import datetime, holidays, json, random, zoneinfo
 from dataclasses import dataclass
-from ioutils import read_json, write_json
+from cogfiles.admin import get_guild_settings
+from resolver import resolve_channel
 from cogfiles.image_editing import ImageEditing
 
 import discord
@@ -85,9 +86,9 @@ class Announcements(commands.GroupCog, group_name="announcements"):
                 return
             
             for guild in self.bot.guilds:
-                channel_id = read_json(guild.id, "periodic_announcement_channel_id")
+                channel_id = get_guild_settings(guild.id).periodic_announcement_channel_id
                 if channel_id is not None:
-                    channel = await self.bot.fetch_channel(channel_id)
+                    channel = await resolve_channel(self.bot, channel_id)
                     file_path = f"{ANNOUNCEMENT_FILES_FOLDER}/{config.filename}"
                     await channel.send(config.message, file=discord.File(file_path))
         return announcement_loop
@@ -96,9 +97,9 @@ class Announcements(commands.GroupCog, group_name="announcements"):
     async def daily_message(self):
         """Generate a random quote from the list of daily messages and send it with a random Kagetsu Tōya template."""
         for guild in self.bot.guilds:
-            channel_id = read_json(guild.id, "daily_message_channel_id")
+            channel_id = get_guild_settings(guild.id).daily_message_channel_id
             if channel_id is not None:
-                channel = await self.bot.fetch_channel(channel_id)
+                channel = await resolve_channel(self.bot, channel_id)
 
                 # Randomly choose the text for the image
                 with open("dailymessages.json", "r", encoding="utf8") as file:
@@ -1,7 +1,9 @@
 import datetime
 import zoneinfo
 from dataclasses import dataclass
-from ioutils import  JsonSerializable, RandomColorEmbed, read_json, write_json, initialize_from_json
+from ioutils import  JsonSerializable, RandomColorEmbed, write_json_entry, initialize_from_json
+from cogfiles.admin import get_guild_settings
+from resolver import resolve_channel, resolve_user
 
 import discord
 from discord import app_commands
@@ -38,7 +40,9 @@ class Birthday(JsonSerializable):
     @staticmethod
     async def from_json(bot: commands.Bot, json_obj: dict[str, int | str]):
         """Convert a JSON dictionary to a ReactionRole object."""
-        user = await bot.fetch_user(int(json_obj["user_id"]))
+        user = await resolve_user(bot, int(json_obj["user_id"]))
+        if user is None:
+            return None
         date = datetime.datetime.strptime(json_obj["date"], "%Y-%m-%d").date()
         return Birthday(user, date)
 
@@ -76,7 +80,7 @@ class Birthdays(commands.GroupCog, name="birthday"):
         old_birthday = next((b for b in self.birthdays[interaction.guild.id] if b.user == birthday.user), None)
         self.birthdays[interaction.guild.id].discard(old_birthday)
         self.birthdays[interaction.guild.id].add(birthday)
-        write_json(interaction.guild.id, "birthdays", value=[birthday.to_json() for birthday in self.birthdays[interaction.guild.id]])
+        write_json_entry(interaction.guild.id, "birthdays", id=birthday.user.id, value=birthday.to_json())
         await interaction.response.send_message(f"Added your birthday: {month.name} {ordinal(day)}{'' if year is None else f', {year}'}", ephemeral=True)
 
     @app_commands.command()
@@ -92,7 +96,7 @@ class Birthdays(commands.GroupCog, name="birthday"):
             return await interaction.response.send_message("This user doesn't have a birthday saved in this server.", ephemeral=True)
 
         self.birthdays[interaction.guild.id].remove(birthday)
-        write_json(interaction.guild.id, "birthdays", value=[birthday.to_json() for birthday in self.birthdays[interaction.guild.id]])
+        write_json_entry(interaction.guild.id, "birthdays", id=birthday.user.id, value=None)
         if user is None:
             await interaction.response.send_message("Removed your birthday.", ephemeral=True)
         else:
@@ -124,7 +128,7 @@ class Birthdays(commands.GroupCog, name="birthday"):
     async def send_birthday_message(self):
         """Sends a message to users on their birthday at midnight EST."""
         for guild in self.bot.guilds:
-            channel_id = read_json(guild.id, "birthday_channel_id")
+            channel_id = get_guild_settings(guild.id).birthday_channel_id
             if channel_id is None:
                 continue
             
@@ -132,7 +136,7 @@ class Birthdays(commands.GroupCog, name="birthday"):
                 now = datetime.datetime.now(tz=zoneinfo.ZoneInfo("US/Eastern"))
                 if birthday.date.month == now.month and birthday.date.day == now.day:
                     # Send birthday message in the correct channel
-                    channel = await self.bot.fetch_channel(channel_id)
+                    channel = await resolve_channel(self.bot, channel_id)
                     
                     if birthday.date.year == datetime.MAXYEAR:
                         await channel.send(f"Happy birthday {birthday.user.mention}!")
@@ -3,7 +3,7 @@ import json
 
 from discord import app_commands
 from discord.ext import commands
-from ioutils import read_json, write_json
+from cogfiles.admin import get_guild_settings
 
 
 class Copypastas(commands.Cog, name="Message Copypastas"):
@@ -11,27 +11,16 @@ class Copypastas(commands.Cog, name="Message Copypastas"):
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.is_copypasta_enabled: dict[int, bool] = {} # Whether or not copypastas are enabled for each server
         with open("copypastas.json", "r") as file:
             self.copypastas = json.load(file)
     
-    @commands.Cog.listener()
-    async def on_ready(self):
-        for guild in self.bot.guilds:
-            self.is_copypasta_enabled[guild.id] = read_json(guild.id, "copypasta") or False
-
-    @commands.Cog.listener()
-    async def on_guild_join(self, guild: discord.Guild):
-        """Initialize copypasta settings when the bot joins a new server."""
-        await self.on_ready()
-
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """Detect key phrases in messages."""
         # The bot shouldn't respond to other bot messages or DMs
         if message.author.bot or type(message.channel) is discord.DMChannel:
             return
-        if not self.is_copypasta_enabled[message.guild.id]:
+        if not get_guild_settings(message.guild.id).copypasta:
             return
         for phrase in self.copypastas:
             if phrase in message.content.lower():
@@ -42,8 +31,7 @@ class Copypastas(commands.Cog, name="Message Copypastas"):
     @app_commands.checks.has_permissions(manage_guild=True)
     async def togglecopypastas(self, interaction: discord.Interaction, toggle: bool):
         """Toggle whether the bot will send a copypasta when a message contains a certain phrase."""
-        self.is_copypasta_enabled[interaction.guild.id] = toggle
-        write_json(interaction.guild.id, "copypasta", value=toggle)
+        get_guild_settings(interaction.guild.id).set(self.bot, "copypasta", toggle)
         await interaction.response.send_message(f"Copypastas in this server are now {'on' if toggle else 'off'}.", ephemeral=True)
 
     @togglecopypastas.error
@@ -7,6 +7,7 @@ from discord import app_commands
 from discord.ext import commands
 
 from ioutils import RandomColorEmbed
+from resolver import resolve_channel, resolve_user
 
 # Lavalink server version must be at or above version 4.0.5
 # We can get Lavalink servers from https://lavalink.darrennathanael.com/NoSSL/lavalink-without-ssl/
@@ -47,7 +48,7 @@ class Music(commands.GroupCog, group_name="music"):
         video_thumbnail = f"https://img.youtube.com/vi/{payload.player.current.identifier}/hqdefault.jpg"
         embed.set_thumbnail(url=video_thumbnail)
 
-        channel = await self.bot.fetch_channel(payload.track.extras.channel_id)
+        channel = await resolve_channel(self.bot, payload.track.extras.channel_id)
         await channel.send(embed=embed)
 
         if self.skipping_manually:
@@ -60,7 +61,7 @@ class Music(commands.GroupCog, group_name="music"):
 
         if payload.player.queue.is_empty and (self.skipping_manually or payload.player.queue.mode == wavelink.QueueMode.normal):
             # To save on resources, we can tell the bot to disconnect from the voice channel.
-            channel = await self.bot.fetch_channel(payload.track.extras.channel_id)
+            channel = await resolve_channel(self.bot, payload.track.extras.channel_id)
             await self.cleanup(payload.player)
             
             if self.skipping_manually:
@@ -329,10 +330,10 @@ class Music(commands.GroupCog, group_name="music"):
         await interaction.response.send_message(embed=embed)
 
     async def format_track(self, track: wavelink.Playable):
-        return f"**[{track.title}]({track.uri})**\nRequested by {(await self.bot.fetch_user(track.extras.requester_id)).mention}"
+        return f"**[{track.title}]({track.uri})**\nRequested by {(await resolve_user(self.bot, track.extras.requester_id)).mention}"
     
     async def format_playlist(self, playlist: wavelink.Playlist, playlist_url: str):
-        return f"**[{playlist.name}]({playlist_url})** - {len(playlist.tracks)} tracks\nRequested by {(await self.bot.fetch_user(playlist[0].extras.requester_id)).mention}"
+        return f"**[{playlist.name}]({playlist_url})** - {len(playlist.tracks)} tracks\nRequested by {(await resolve_user(self.bot, playlist[0].extras.requester_id)).mention}"
         # playlist.url defaults to None, so we have to pass in the playlist_url from play()
 
     @app_commands.command()
@@ -4,14 +4,15 @@ import re
 from dataclasses import dataclass, field
 from discord import app_commands
 from discord.ext import commands
-from ioutils import JsonSerializable, RandomColorEmbed, write_json, initialize_from_json
+from ioutils import JsonSerializable, RandomColorEmbed, write_json_entry, initialize_from_json
+from resolver import resolve_channel
 
 
 @dataclass(frozen=True, order=True)
 class ReactionRole(JsonSerializable):
     """Data associated with a reaction role."""
     channel: discord.TextChannel = field(compare=False)
-    message: discord.Message = field(compare=False)
+    message: discord.PartialMessage = field(compare=False)
     role: discord.Role = field()
     emoji: discord.PartialEmoji = field(compare=False)
 
@@ -26,15 +27,20 @@ class ReactionRole(JsonSerializable):
 
     @staticmethod
     async def from_json(bot: commands.Bot, json_obj: dict[str, int | str]):
-        """Convert a JSON dictionary to a ReactionRole object."""
-        channel = await bot.fetch_channel(json_obj["channel_id"])
+        """Convert a JSON dictionary to a ReactionRole object.
+        The message is only stored by ID as a partial message, since it is only needed for its ID, link and reactions."""
+        channel = await resolve_channel(bot, json_obj["channel_id"])
         
         if channel is not None:
-            message = await channel.fetch_message(json_obj["message_id"])
+            message = channel.get_partial_message(json_obj["message_id"])
             role = channel.guild.get_role(json_obj["role_id"])
             emoji = discord.PartialEmoji.from_str(json_obj["emoji"])
             return ReactionRole(channel, message, role, emoji)
 
+def emoji_key(emoji: discord.PartialEmoji) -> int | str:
+    """Returns a key that identifies an emoji: the ID of a custom emoji, which stays the same if it is renamed, or the name of a unicode emoji."""
+    return emoji.name if emoji.id is None else emoji.id
+
 @app_commands.guild_only()
 class ReactionRoles(commands.GroupCog, name="reactionrole"):
     """Manage ping roles through message reactions."""
@@ -42,11 +48,36 @@ class ReactionRoles(commands.GroupCog, name="reactionrole"):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.reactionroles: dict[int, set[ReactionRole]] = {}
+        self.reactionroles_by_reaction: dict[tuple[int, int | str], list[ReactionRole]] = {} # (Message ID, emoji key) to the reaction roles for reacting to that message with that emoji
+        self.reactionroles_by_role: dict[int, ReactionRole] = {} # Role ID to the reaction role for that role
 
     @commands.Cog.listener()
     async def on_ready(self):
         """Initialize the list of reaction roles in memory."""
         await initialize_from_json(self.bot, ReactionRole, self.reactionroles, "reaction_roles")
+        self.reactionroles_by_reaction = {}
+        self.reactionroles_by_role = {}
+        for reactionroles in self.reactionroles.values():
+            for reactionrole in reactionroles:
+                self.index(reactionrole)
+
+    def index(self, reactionrole: ReactionRole):
+        """Adds a reaction role to the lookups by reaction and by role."""
+        self.reactionroles_by_reaction.setdefault((reactionrole.message.id, emoji_key(reactionrole.emoji)), []).append(reactionrole)
+        if reactionrole.role is not None: # The role may have been deleted
+            self.reactionroles_by_role[reactionrole.role.id] = reactionrole
+
+    def unindex(self, reactionrole: ReactionRole):
+        """Removes a reaction role from the lookups by reaction and by role."""
+        reaction = (reactionrole.message.id, emoji_key(reactionrole.emoji))
+        # Several roles can share a message and emoji, so only this reaction role is removed from the reaction's list
+        reactionroles = self.reactionroles_by_reaction.get(reaction, [])
+        if reactionrole in reactionroles:
+            reactionroles.remove(reactionrole)
+            if len(reactionroles) == 0:
+                del self.reactionroles_by_reaction[reaction]
+        if reactionrole.role is not None and self.reactionroles_by_role.get(reactionrole.role.id) is reactionrole:
+            del self.reactionroles_by_role[reactionrole.role.id]
     
     @app_commands.command()
     @app_commands.rename(emoji_str="emoji")
@@ -65,7 +96,10 @@ class ReactionRoles(commands.GroupCog, name="reactionrole"):
             try:
                 channel_id = regex_searches.group(1)
                 message_id = regex_searches.group(2)
-                channel = await interaction.guild.fetch_channel(int(channel_id))
+                channel = await resolve_channel(self.bot, int(channel_id))
+                # The resolver can find channels in any server the bot is in, but the message must be in this server
+                if channel is None or getattr(channel, "guild", None) is None or channel.guild.id != interaction.guild.id:
+                    return await interaction.response.send_message("Could not find the given message in this server.", ephemeral=True)
                 message = await channel.fetch_message(int(message_id))
             except (discord.errors.HTTPException, AttributeError):
                 return await interaction.response.send_message("Could not find the given message.", ephemeral=True)
@@ -78,10 +112,13 @@ class ReactionRoles(commands.GroupCog, name="reactionrole"):
         new_reactionrole = ReactionRole(channel, message, role, emoji)
 
         # If there already exists a reaction role for this role, remove it and replace it with the new one
-        old_reactionrole = next((reactionrole for reactionrole in self.reactionroles[interaction.guild.id] if reactionrole.role == new_reactionrole.role), None)
-        self.reactionroles[interaction.guild.id].discard(old_reactionrole)
+        old_reactionrole = self.reactionroles_by_role.get(role.id)
+        if old_reactionrole is not None:
+            self.reactionroles[interaction.guild.id].discard(old_reactionrole)
+            self.unindex(old_reactionrole)
         self.reactionroles[interaction.guild.id].add(new_reactionrole)
-        write_json(interaction.guild.id, "reaction_roles", value=[reactionrole.to_json() for reactionrole in self.reactionroles[interaction.guild.id]])
+        self.index(new_reactionrole)
+        write_json_entry(interaction.guild.id, "reaction_roles", id=role.id, value=new_reactionrole.to_json())
 
         embed = RandomColorEmbed(title="Reaction Role", description=f"React to this message with {emoji} to get the {role.mention} role: {message.jump_url}")
         if old_reactionrole is not None:
@@ -92,13 +129,14 @@ class ReactionRoles(commands.GroupCog, name="reactionrole"):
     @app_commands.checks.has_permissions(manage_guild=True)
     async def remove(self, interaction: discord.Interaction, role: discord.Role):
         "Removes a reaction role message."
-        old_reactionrole = next((reactionrole for reactionrole in self.reactionroles[interaction.guild.id] if reactionrole.role == role), None)
+        old_reactionrole = self.reactionroles_by_role.get(role.id)
         if old_reactionrole is None:
             return await interaction.response.send_message("Could not find a reaction role for that role.", ephemeral=True)
         
         await old_reactionrole.message.remove_reaction(old_reactionrole.emoji, self.bot.user)
         self.reactionroles[interaction.guild.id].discard(old_reactionrole)
-        write_json(interaction.guild.id, "reaction_roles", value=[reactionrole.to_json() for reactionrole in self.reactionroles[interaction.guild.id]])
+        self.unindex(old_reactionrole)
+        write_json_entry(interaction.guild.id, "reaction_roles", id=role.id, value=None)
 
         embed = RandomColorEmbed(title="Reaction Role Removed", description=f"\nThe reaction role for {role.mention} at {old_reactionrole.message.jump_url} has been removed.")
         await interaction.response.send_message(embed=embed, ephemeral=True)
@@ -124,13 +162,12 @@ class ReactionRoles(commands.GroupCog, name="reactionrole"):
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         """Called when a message has a reaction added. 
         This is called regardless of the state of the internal message cache, for example with old messages."""
-        guild = self.bot.get_guild(payload.guild_id)
-        member = guild.get_member(payload.user_id)
         role = self.get_role(payload)
-
         if role is None:
             return
-        if member.bot:
+        guild = self.bot.get_guild(payload.guild_id)
+        member = payload.member
+        if member is None or member.bot:
             return
 
         try:
@@ -145,13 +182,12 @@ class ReactionRoles(commands.GroupCog, name="reactionrole"):
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
         """Called when a message has a reaction removed. 
         This is called regardless of the state of the internal message cache, for example with old messages."""
-        guild = self.bot.get_guild(payload.guild_id)
-        member = guild.get_member(payload.user_id)
         role = self.get_role(payload)
-
         if role is None:
             return
-        if member.bot:
+        guild = self.bot.get_guild(payload.guild_id)
+        member = guild.get_member(payload.user_id)
+        if member is None or member.bot:
             return
 
         try:
@@ -164,9 +200,6 @@ class ReactionRoles(commands.GroupCog, name="reactionrole"):
     
     def get_role(self, payload: discord.RawReactionActionEvent) -> discord.Role | None:
         """Gets the role that should be given/removed to the user on a given reaction.
-        Returns None if the reaction does not correspond to any reaction role."""
-        guild = self.bot.get_guild(payload.guild_id)
-        member = guild.get_member(payload.user_id)
-        if member.bot or all(reactionrole.message.id != payload.message_id for reactionrole in self.reactionroles[payload.guild_id]):
-            return None
-        return next((reactionrole.role for reactionrole in self.reactionroles[payload.guild_id] if reactionrole.message.id == payload.message_id and reactionrole.emoji == payload.emoji), None)
+        Returns None if the reaction does not correspond to any reaction role, which is the case for most reactions."""
+        reactionroles = self.reactionroles_by_reaction.get((payload.message_id, emoji_key(payload.emoji)))
+        return None if reactionroles is None else reactionroles[0].role
@@ -1,6 +1,8 @@
-import datetime
+import asyncio, bisect, dataclasses, datetime, functools, heapq, re
+from collections import deque
 from dataclasses import dataclass, field
-from ioutils import JsonSerializable, RandomColorEmbed, write_json, initialize_from_json
+from ioutils import JsonSerializable, RandomColorEmbed, read_json, write_json, write_json_entries, initialize_from_json
+from resolver import resolve_channel, resolve_user
 
 import discord
 from discord import app_commands
@@ -8,35 +10,93 @@ from discord.ext import commands, tasks
 from discord.utils import format_dt
 
 
+@dataclass(frozen=True)
+class Recurrence:
+    """How often a recurring reminder repeats: either at a fixed interval, or at the same time on certain days of the week."""
+    expression: str # The normalized text the recurrence was parsed from, which is how it is saved
+    interval: datetime.timedelta | None = None
+    weekdays: frozenset[int] | None = None # 0 is Monday
+
+    MIN_INTERVAL = datetime.timedelta(hours=1)
+    MAX_INTERVAL = datetime.timedelta(weeks=52)
+    UNITS = {"minute": datetime.timedelta(minutes=1), "hour": datetime.timedelta(hours=1), "day": datetime.timedelta(days=1), "week": datetime.timedelta(weeks=1)}
+    ALIASES = {"hourly": "every 1 hour", "daily": "every 1 day", "weekly": "every 1 week", "weekdays": "mon,tue,wed,thu,fri", "weekends": "sat,sun"}
+    WEEKDAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+    def __str__(self):
+        return self.expression
+
+    @staticmethod
+    def parse(expression: str) -> "Recurrence":
+        """Parses a recurrence such as "daily", "weekly", "every 3 days", "every 12 hours", "weekdays" or "mon,wed,fri".
+        Raises a ValueError describing the problem if the expression cannot be parsed."""
+        expression = " ".join(expression.lower().split())
+        expression = Recurrence.ALIASES.get(expression, expression)
+
+        if (match := re.fullmatch(r"every (\d+) (minute|hour|day|week)s?", expression)) is not None:
+            count, unit = int(match.group(1)), match.group(2)
+            # Check the count before multiplying, since a huge count would overflow the timedelta
+            if count > Recurrence.MAX_INTERVAL // Recurrence.UNITS[unit]:
+                raise ValueError("Reminders must repeat at least once every 52 weeks.")
+            interval = count * Recurrence.UNITS[unit]
+            if interval < Recurrence.MIN_INTERVAL:
+                raise ValueError("Reminders can repeat at most once an hour.")
+            return Recurrence(f"every {count} {unit}{'s' if count != 1 else ''}", interval=interval)
+
+        days = [day.strip()[:3] for day in expression.split(",")]
+        if all(day in Recurrence.WEEKDAYS for day in days):
+            weekdays = frozenset(Recurrence.WEEKDAYS.index(day) for day in days)
+            return Recurrence(",".join(day for i, day in enumerate(Recurrence.WEEKDAYS) if i in weekdays), weekdays=weekdays)
+
+        raise ValueError(f"{expression!r} is not a valid repeat schedule. Try \"daily\", \"weekly\", \"every 3 days\" or \"mon,wed,fri\".")
+
+    def next_after(self, previous: datetime.datetime, now: datetime.datetime) -> datetime.datetime:
+        """Returns the first occurrence after now, skipping any occurrences that were missed since the previous one."""
+        if self.interval is not None:
+            missed_occurrences = max(0, (now - previous) // self.interval)
+            return previous + (missed_occurrences + 1) * self.interval
+
+        # Start from the latest day on or before now at the previous occurrence's time of day, then check the next week of days
+        start = previous + datetime.timedelta(days=max(0, (now - previous).days))
+        for days in range(1, 8):
+            occurrence = start + datetime.timedelta(days=days)
+            if occurrence.weekday() in self.weekdays and occurrence > now:
+                return occurrence
+        return start + datetime.timedelta(days=8) # Unreachable, since there is at least one weekday
+
 @dataclass(frozen=True, order=True)
 class Reminder(JsonSerializable):
     """Data associated with a scheduled reminder."""
     author: discord.User = field(compare=False)
     channel: discord.TextChannel | discord.ForumChannel = field(compare=False)
-    command_message: discord.Message = field(compare=False) # This will be None when the reminder is created via slash command
+    command_message: discord.PartialMessage = field(compare=False) # This will be None when the reminder is created via slash command
     original_message_datetime: datetime.datetime = field(compare=False)
     reminder_datetime: datetime.datetime
     reminder_str: str = field(compare=False)
-    slash_message: discord.Message = field(compare=False) # This will be None when the reminder is created via regular command
+    slash_message: discord.PartialMessage = field(compare=False) # This will be None when the reminder is created via regular command
     subscribers: set[discord.User] = field(hash=False)
+    recurrence: Recurrence | None = field(default=None, compare=False) # This will be None when the reminder is only sent once
 
     def __str__(self):
-        message = self.slash_message if self.command_message is None else self.command_message
-        return f"{self.author.mention} - {message.jump_url} @ {format_dt(self.reminder_datetime, style='F')}: {self.reminder_str!r}"
+        repeats = "" if self.recurrence is None else f" (repeats {self.recurrence})"
+        return f"{self.author.mention} - {self.message.jump_url} @ {format_dt(self.reminder_datetime, style='F')}{repeats}: {self.reminder_str!r}"
 
     def __repr__(self):
         MAX_LENGTH = 100
-        if self.command_message is None:
-            out = f"{self.author.name} - #{self.channel.name} @ {self.reminder_datetime:%a %b %d, %I:%M %p}: {self.reminder_str!r}"
-        else:
-            out = f"{self.command_message.author.name} - #{self.command_message.channel.name} @ {self.reminder_datetime:%a %b %d, %I:%M %p}: {self.reminder_str!r}"
+        out = f"{self.author.name} - #{self.channel.name} @ {self.reminder_datetime:%a %b %d, %I:%M %p}: {self.reminder_str!r}"
         if len(out) > MAX_LENGTH:
             out = out[:MAX_LENGTH-3] + "..."
         return out
 
+    @property
+    def id(self) -> int:
+        """The ID of the message that created this reminder, which uniquely identifies it."""
+        return self.slash_message.id if self.command_message is None else self.command_message.id
+
     def to_json(self) -> dict[str, int | float | str]:
         """Convert the current reminder object to a JSON string."""
-        return {
+        json_obj = {
+            "id": self.id,
             "author_id": self.author.id,
             "channel_id": self.channel.id,
             "command_message_id": -1 if self.command_message is None else self.command_message.id,
@@ -44,27 +104,42 @@ class Reminder(JsonSerializable):
             "reminder_timestamp": self.reminder_datetime.timestamp(),
             "reminder_str": self.reminder_str,
             "slash_message_id": -1 if self.slash_message is None else self.slash_message.id,
-            "subscriber_ids": [subscriber.id for subscriber in self.subscribers]
+            "subscriber_ids": [subscriber.id for subscriber in self.subscribers],
+            "repeat": None if self.recurrence is None else self.recurrence.expression
         }
+        if self.command_message is not None:
+            json_obj["reactions_tracked"] = True # The subscribers are kept up to date with the command message's reactions
+        return json_obj
 
     @staticmethod
     async def from_json(bot: commands.Bot, json_obj: dict[str, int | float | str]):
-        """Convert a JSON dictionary to a Reminder object."""
-        try:
-            channel = await bot.fetch_channel(json_obj["channel_id"])
-        except (discord.errors.NotFound, discord.errors.Forbidden):
-            return None
+        """Convert a JSON dictionary to a Reminder object.
+        Channels and users are taken from the bot's cache where possible, and messages are only stored by ID as partial messages,
+        so no requests are needed unless something is missing from the cache."""
+        channel = await resolve_channel(bot, json_obj["channel_id"])
+        author = await resolve_user(bot, json_obj["author_id"])
         
-        if channel is not None:
-            command_message = None if json_obj["command_message_id"] < 0 else await channel.fetch_message(json_obj["command_message_id"])
+        if channel is not None and author is not None:
+            command_message = None if json_obj["command_message_id"] < 0 else channel.get_partial_message(json_obj["command_message_id"])
             original_message_datetime = datetime.datetime.fromtimestamp(json_obj["original_message_timestamp"]) if command_message is None else command_message.created_at
             reminder_datetime = datetime.datetime.fromtimestamp(json_obj["reminder_timestamp"])
             reminder_str = json_obj["reminder_str"]
-            author = await bot.fetch_user(json_obj["author_id"]) if command_message is None else command_message.author
-            slash_message = None if json_obj["slash_message_id"] < 0 else await channel.fetch_message(json_obj["slash_message_id"])
-            subscribers = [await bot.fetch_user(subscriber_id) for subscriber_id in json_obj["subscriber_ids"]] if command_message is None else []
+            slash_message = None if json_obj["slash_message_id"] < 0 else channel.get_partial_message(json_obj["slash_message_id"])
+            if command_message is not None and not json_obj.get("reactions_tracked", False):
+                # Reminders created with a regular command before reactions were tracked read their subscribers from the reactions once
+                subscribers = await read_subscribers_from_reactions(command_message)
+            else:
+                subscribers = [await resolve_user(bot, subscriber_id) for subscriber_id in json_obj["subscriber_ids"]]
+                subscribers = [subscriber for subscriber in subscribers if subscriber is not None]
+
+            recurrence = None if json_obj.get("repeat") is None else Recurrence.parse(json_obj["repeat"])
 
-            return Reminder(author, channel, command_message, original_message_datetime, reminder_datetime, reminder_str, slash_message, subscribers)
+            return Reminder(author, channel, command_message, original_message_datetime, reminder_datetime, reminder_str, slash_message, subscribers, recurrence)
+
+    @property
+    def message(self) -> discord.PartialMessage:
+        """The message that created this reminder, which the reminder replies to."""
+        return self.slash_message if self.command_message is None else self.command_message
 
     def is_viewable(self, user: discord.Member):
         """Returns true if the user has permission to view this reminder or the user created this reminder."""
@@ -74,10 +149,109 @@ class Reminder(JsonSerializable):
         """Returns true if the user has subscribed to this reminder or the user created this reminder."""
         return self.author == user or user in self.subscribers
 
-    def copy(self):
-        # We need to ensure that different Reminder objects do not point to the same subscribers list
-        # This ensures that when the list of subscribers in one Reminder is modified, copies of that Reminder are not also modified (such as Reminders._cached_reminders)
-        return Reminder(self.author, self.channel, self.command_message, self.original_message_datetime, self.reminder_datetime, self.reminder_str, self.slash_message, self.subscribers.copy())
+async def read_subscribers_from_reactions(message: discord.PartialMessage) -> list[discord.User]:
+    """Returns the users who reacted to a message with 👍, or no users if the message cannot be found."""
+    try:
+        message = await message.fetch()
+    except (discord.errors.NotFound, discord.errors.Forbidden):
+        return []
+    for reaction in message.reactions:
+        if reaction.emoji == "👍":
+            return [user async for user in reaction.users()]
+    return []
+
+class GuildReminders:
+    """The reminders scheduled in one guild, indexed by ID, author, subscriber and channel, and kept in order of when they will be sent.
+    This lets reminders be listed for a user by looking only at the reminders they can see, rather than at every reminder in the guild."""
+
+    def __init__(self, reminders=()):
+        self.by_id: dict[int, Reminder] = {}
+        self.by_author: dict[int, set[int]] = {} # User ID to the IDs of the reminders they created
+        self.by_subscriber: dict[int, set[int]] = {} # User ID to the IDs of the reminders they are subscribed to
+        self.by_channel: dict[int, set[int]] = {} # Channel ID to the IDs of the reminders sent in that channel
+        self._by_deadline: list[tuple[float, int]] = [] # (timestamp, reminder ID) for every reminder, kept sorted
+        for reminder in reminders:
+            self.add(reminder)
+
+    def __contains__(self, reminder: Reminder) -> bool:
+        return self.by_id.get(reminder.id) is reminder
+
+    def __iter__(self):
+        """Iterates over the reminders, earliest first."""
+        return (self.by_id[id] for _, id in self._by_deadline)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+    def get(self, id: int) -> Reminder | None:
+        return self.by_id.get(id)
+
+    def add(self, reminder: Reminder):
+        """Adds a reminder, replacing any reminder with the same ID."""
+        if reminder.id in self.by_id:
+            self.discard(self.by_id[reminder.id])
+        self.by_id[reminder.id] = reminder
+        self.by_author.setdefault(reminder.author.id, set()).add(reminder.id)
+        self.by_channel.setdefault(reminder.channel.id, set()).add(reminder.id)
+        for subscriber in reminder.subscribers:
+            self.by_subscriber.setdefault(subscriber.id, set()).add(reminder.id)
+        bisect.insort(self._by_deadline, (reminder.reminder_datetime.timestamp(), reminder.id))
+
+    def discard(self, reminder: Reminder):
+        """Removes a reminder, if it is still here."""
+        if reminder not in self:
+            return
+        del self.by_id[reminder.id]
+        _discard_from_index(self.by_author, reminder.author.id, reminder.id)
+        _discard_from_index(self.by_channel, reminder.channel.id, reminder.id)
+        for subscriber in reminder.subscribers:
+            _discard_from_index(self.by_subscriber, subscriber.id, reminder.id)
+        key = (reminder.reminder_datetime.timestamp(), reminder.id)
+        del self._by_deadline[bisect.bisect_left(self._by_deadline, key)]
+
+    def subscribe(self, reminder: Reminder, user: discord.User):
+        reminder.subscribers.append(user)
+        self.by_subscriber.setdefault(user.id, set()).add(reminder.id)
+
+    def unsubscribe(self, reminder: Reminder, user: discord.User):
+        reminder.subscribers.remove(user)
+        if user not in reminder.subscribers:
+            _discard_from_index(self.by_subscriber, user.id, reminder.id)
+
+    def viewable_by(self, member: discord.Member, only_reminders_for_member: bool = False) -> list[Reminder]:
+        """Returns the reminders the member can view (see Reminder.is_viewable), earliest first. 
+        If only_reminders_for_member is set, only the reminders that will ping the member are returned.
+        Permissions are checked once per channel, and only the channels the member has reminders in are checked when filtering to them."""
+        if only_reminders_for_member:
+            ids = self.by_author.get(member.id, set()) | self.by_subscriber.get(member.id, set())
+            if not member.guild_permissions.manage_guild:
+                can_read_channel = {}
+                for id in list(ids):
+                    reminder = self.by_id[id]
+                    if reminder.author.id == member.id:
+                        continue
+                    if reminder.channel.id not in can_read_channel:
+                        can_read_channel[reminder.channel.id] = reminder.channel.permissions_for(member).read_messages
+                    if not can_read_channel[reminder.channel.id]:
+                        ids.discard(id)
+        elif member.guild_permissions.manage_guild:
+            return list(self)
+        else:
+            ids = set(self.by_author.get(member.id, set()))
+            for channel_ids in self.by_channel.values():
+                channel = self.by_id[next(iter(channel_ids))].channel
+                if channel.permissions_for(member).read_messages:
+                    ids |= channel_ids
+
+        return sorted((self.by_id[id] for id in ids), key=lambda r: (r.reminder_datetime.timestamp(), r.id))
+
+def _discard_from_index(index: dict[int, set[int]], key: int, id: int):
+    """Removes a reminder ID from one of GuildReminders' indexes, dropping the key once it has no reminders left."""
+    ids = index.get(key)
+    if ids is not None:
+        ids.discard(id)
+        if len(ids) == 0:
+            del index[key]
 
 class ReminderSubscribeView(discord.ui.View):
 
@@ -87,68 +261,231 @@ class ReminderSubscribeView(discord.ui.View):
 
     @discord.ui.button(label="I want to be reminded too!", emoji="👍", custom_id="reminder_subscribe_button")
     async def subscribe_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if self.reminder is None:
+        reminders_cog = interaction.client.get_cog("Reminders")
+        # Recurring reminders are replaced each time they are sent, so look up the reminder's current version by its ID
+        reminder = None if self.reminder is None else reminders_cog.reminders.get(interaction.guild_id, {}).get(self.reminder.id)
+        if reminder is None:
             return await interaction.response.send_message("This reminder has already been sent.", ephemeral=True)
-        if interaction.user == self.reminder.author:
+        if interaction.user == reminder.author:
             return await interaction.response.send_message("You are already set to be notified of this reminder.", ephemeral=True) #TODO: Make this a toggleable button
-        if interaction.user in self.reminder.subscribers:
-            self.reminder.subscribers.remove(interaction.user)
+        if interaction.user in reminder.subscribers:
+            reminders_cog.unsubscribe_from_reminder(interaction.guild_id, reminder, interaction.user)
             return await interaction.response.send_message("You will no longer be reminded of this.", ephemeral=True)
         else:
-            self.reminder.subscribers.append(interaction.user)
-            return await interaction.response.send_message(f"You will be reminded of this {format_dt(self.reminder.reminder_datetime, style='R')}.", ephemeral=True)
+            reminders_cog.subscribe_to_reminder(interaction.guild_id, reminder, interaction.user)
+            return await interaction.response.send_message(f"You will be reminded of this {format_dt(reminder.reminder_datetime, style='R')}.", ephemeral=True)
 
-class ReminderCancelSelect(discord.ui.Select):
+class ReminderPageView(discord.ui.View):
+    """Shows a list of reminders one page at a time, with buttons to move between the pages.
+    Only the current page is rendered, so long lists stay within Discord's limits and are cheap to show."""
 
-    def __init__(self, interaction: discord.Interaction, reminders: set[Reminder]):
-        self.bot = interaction.client
+    def __init__(self, member: discord.Member, reminders: list[Reminder], page_size: int):
+        super().__init__(timeout=15*60) # Ephemeral messages can only be edited for 15 minutes
+        self.member = member
         self.reminders = reminders
+        self.page_size = page_size
+        self.page = 0
+        self.update_page()
+
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.reminders) // self.page_size))
+
+    def current_page(self) -> list[Reminder]:
+        """Returns the reminders on the current page."""
+        start = self.page * self.page_size
+        return self.reminders[start:start + self.page_size]
+
+    def update_page(self):
+        """Updates the view's items to match the current page."""
+        self.page = min(self.page, self.page_count - 1)
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page == self.page_count - 1
+
+    def render(self) -> dict:
+        """Returns the message contents for the current page, as keyword arguments for sending or editing the message."""
+        return {"content": f"Page {self.page + 1}/{self.page_count}"}
+
+    async def show_page(self, interaction: discord.Interaction, page: int):
+        self.page = page
+        self.update_page()
+        await interaction.response.edit_message(**self.render(), view=self)
+
+    @discord.ui.button(label="Previous", emoji="◀️", row=1)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page - 1)
+
+    @discord.ui.button(label="Next", emoji="▶️", row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show_page(interaction, self.page + 1)
 
-        options = [discord.SelectOption(label=repr(reminder)) for reminder in sorted(reminders, key=lambda r: r.reminder_datetime.timestamp())]
-        super().__init__(placeholder="Select reminders to cancel...", max_values=len(reminders), options=options)
+    async def interaction_check(self, interaction: discord.Interaction):
+        """Checks whether the callback should be processed."""
+        return interaction.user == self.member
+
+class ReminderListView(ReminderPageView):
+    PAGE_SIZE = 10
+
+    def __init__(self, member: discord.Member, reminders: list[Reminder]):
+        super().__init__(member, reminders, ReminderListView.PAGE_SIZE)
+
+    def render(self) -> dict:
+        start = self.page * self.page_size
+        lines = [f"{start+i+1}. {reminder}" for i, reminder in enumerate(self.current_page())]
+        reminder_list = RandomColorEmbed(title="Scheduled Reminders", description=limit_lines(lines, MAX_EMBED_DESCRIPTION_LENGTH))
+        reminder_list.set_footer(text=f"Page {self.page + 1}/{self.page_count}")
+        return {"embed": reminder_list}
+
+class ReminderCancelSelect(discord.ui.Select):
+
+    def __init__(self, reminders: list[Reminder]):
+        # Each option's value is the reminder's ID, so selections can be looked up directly
+        options = [discord.SelectOption(label=repr(reminder), value=str(reminder.id)) for reminder in reminders]
+        super().__init__(placeholder="Select reminders to cancel...", max_values=len(options), options=options, row=0)
     
     async def callback(self, interaction: discord.Interaction):
         """The callback associated with this UI item."""
-        cancelled_reminders = {reminder for reminder in self.reminders if repr(reminder) in self.values}
-        self.bot.get_cog("Reminders").reminders[interaction.guild_id] -= cancelled_reminders
+        reminders_cog = interaction.client.get_cog("Reminders")
+        guild_reminders = reminders_cog.reminders.get(interaction.guild_id)
+        selected_reminders = [guild_reminders.get(int(value)) for value in self.values] if guild_reminders is not None else []
+        cancelled_reminders = sorted((reminder for reminder in selected_reminders if reminder is not None), key=lambda r: r.reminder_datetime.timestamp())
+        reminders_cog.cancel_reminders(interaction.guild_id, cancelled_reminders)
+
+        self.view.remove_reminders(self.values)
+        if len(self.view.reminders) == 0:
+            self.view.stop()
+            await interaction.response.edit_message(content="No reminders currently set.", view=None)
+        else:
+            await interaction.response.edit_message(**self.view.render(), view=self.view)
 
+        if len(cancelled_reminders) == 0:
+            return await interaction.followup.send("Those reminders have already been sent or cancelled.", ephemeral=True)
         cancelled_reminder_list = RandomColorEmbed(
             title="Cancelled Reminders", 
-            description='\n'.join([str(reminder) for reminder in sorted(cancelled_reminders, key=lambda r: r.reminder_datetime.timestamp())])
+            description=limit_lines([str(reminder) for reminder in cancelled_reminders], MAX_EMBED_DESCRIPTION_LENGTH)
         )
-        await interaction.response.send_message(embed=cancelled_reminder_list, ephemeral=True)
-
-class ReminderCancelView(discord.ui.View):
-    def __init__(self, interaction: discord.Interaction, reminders: set[Reminder]):
-        super().__init__(timeout=None)
-        self.member = interaction.user
-        self.add_item(ReminderCancelSelect(interaction, reminders))
-    
-    async def interaction_check(self, interaction: discord.Interaction):
-        """Checks whether the callback should be processed."""
-        return interaction.user == self.member
+        await interaction.followup.send(embed=cancelled_reminder_list, ephemeral=True)
+
+class ReminderCancelView(ReminderPageView):
+    PAGE_SIZE = 25 # The most options a select menu can have
+
+    def __init__(self, member: discord.Member, reminders: list[Reminder]):
+        self.select: ReminderCancelSelect | None = None
+        super().__init__(member, reminders, ReminderCancelView.PAGE_SIZE)
+
+    def update_page(self):
+        super().update_page()
+        if self.select is not None:
+            self.remove_item(self.select)
+        self.select = ReminderCancelSelect(self.current_page())
+        self.add_item(self.select)
+
+    def remove_reminders(self, ids: list[str]):
+        """Removes reminders from the list by ID, once they have been cancelled."""
+        ids = set(ids)
+        self.reminders = [reminder for reminder in self.reminders if str(reminder.id) not in ids]
+        self.update_page()
+
+MAX_MESSAGE_LENGTH = 2000
+MAX_EMBED_DESCRIPTION_LENGTH = 4096
+
+
+class ReminderDispatcher:
+    """Sends messages in many channels at once, while sending each channel's messages one at a time and in order.
+    Discord rate limits each channel separately, so this keeps one busy channel from delaying the others,
+    while the cap on messages being sent at once keeps all of them under the global rate limit."""
+    MAX_CONCURRENT_SENDS = 10
+    MAX_ATTEMPTS = 5
+
+    def __init__(self):
+        self._queues: dict[int, deque[tuple]] = {} # Channel ID to the sends waiting in that channel
+        self._workers: set[asyncio.Task] = set() # Keeps a reference to each channel's running task until it finishes
+        self._semaphore = asyncio.Semaphore(ReminderDispatcher.MAX_CONCURRENT_SENDS)
+
+    def dispatch(self, channel_id: int, send, on_failure=None):
+        """Queues a coroutine function that sends a message in the given channel. 
+        If it still fails after retrying, on_failure is called."""
+        if channel_id in self._queues:
+            self._queues[channel_id].append((send, on_failure))
+        else:
+            self._queues[channel_id] = deque([(send, on_failure)])
+            worker = asyncio.create_task(self._send_all(channel_id))
+            self._workers.add(worker)
+            worker.add_done_callback(self._workers.discard)
+
+    async def _send_all(self, channel_id: int):
+        """Sends everything queued for a channel, until its queue is empty."""
+        queue = self._queues[channel_id]
+        try:
+            while len(queue) > 0:
+                send, on_failure = queue.popleft()
+                try:
+                    await self._send_with_retries(send)
+                except Exception as error: # One failed send (including connection errors) should not stop the rest of the channel's sends
+                    print(f"Failed to send a message in channel {channel_id}: {error!r}")
+                    if on_failure is not None:
+                        on_failure()
+        finally:
+            # Anything queued after this point starts a new worker for the channel
+            del self._queues[channel_id]
+
+    async def _send_with_retries(self, send):
+        """Sends a message, waiting and retrying if it is rate limited (HTTP 429) or Discord has a server error.
+        discord.py already waits out short rate limits itself, so this handles the ones it gives up on."""
+        for attempt in range(1, ReminderDispatcher.MAX_ATTEMPTS + 1):
+            async with self._semaphore:
+                try:
+                    return await send()
+                except discord.errors.RateLimited as error:
+                    if attempt == ReminderDispatcher.MAX_ATTEMPTS:
+                        raise
+                    retry_after = error.retry_after
+                except discord.errors.HTTPException as error:
+                    if attempt == ReminderDispatcher.MAX_ATTEMPTS or (error.status != 429 and error.status < 500):
+                        raise
+                    retry_after = 2 ** attempt
+            await asyncio.sleep(retry_after)
 
 class Reminders(commands.Cog, name="Reminders"):
     """Create and send scheduled reminder messages."""
     
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.reminders: dict[int, set[Reminder]] = {}
-        self._cached_reminders: dict[int, set[Reminder]] = {}
+        self.reminders: dict[int, GuildReminders] = {}
+        self._unsaved_reminders: dict[int, dict[int, Reminder | None]] = {} # Guild ID to reminder ID to the changed reminder (or None if removed), for reminders changed since the last save
+        self._reminder_heap: list[tuple[float, int, int, Reminder]] = [] # (timestamp, reminder ID, guild ID, reminder) for every scheduled reminder, earliest first
+        self._reminder_heap_changed = asyncio.Event() # Wakes the scheduler when a reminder is added or cancelled
+        self._scheduler: asyncio.Task | None = None
+        self.dispatcher = ReminderDispatcher()
 
     @commands.Cog.listener()
     async def on_ready(self):
         """Initialize the reminders instance dictionary from JSON data and start the reminder processing loop."""
-        await initialize_from_json(self.bot, Reminder, self.reminders, "reminders")
+        loaded_reminders: dict[int, set[Reminder]] = {}
+        await initialize_from_json(self.bot, Reminder, loaded_reminders, "reminders")
+        self.reminders = {guild_id: GuildReminders(reminders) for guild_id, reminders in loaded_reminders.items()}
+        self._reminder_heap = []
         for guild in self.bot.guilds:
-            self._cached_reminders[guild.id] = deepcopy(self.reminders[guild.id])
+            if any("id" not in json_obj for json_obj in read_json(guild.id, "reminders")):
+                # Reminders saved before they had IDs are rewritten once, so that they can be saved individually from now on
+                write_json(guild.id, "reminders", value=[reminder.to_json() for reminder in self.reminders[guild.id]])
+            for json_obj in read_json(guild.id, "reminders"):
+                if json_obj["command_message_id"] >= 0 and not json_obj.get("reactions_tracked", False) and json_obj["id"] in self.reminders[guild.id].by_id:
+                    # Save the subscribers that were just read from the command message's reactions, so they are not read again
+                    self.mark_unsaved(guild.id, self.reminders[guild.id].by_id[json_obj["id"]])
             for reminder in self.reminders[guild.id]:
+                self._reminder_heap.append((reminder.reminder_datetime.timestamp(), reminder.id, guild.id, reminder))
                 if reminder.slash_message is not None:
                     # This makes the views on existing reminders persistent between application restarts
                     view = ReminderSubscribeView(reminder)
                     self.bot.add_view(view=view, message_id=reminder.slash_message.id)
-        self.send_reminders.start()
-        self.sync_json.start()
+        heapq.heapify(self._reminder_heap)
+        self.catch_up_on_overdue_reminders()
+        self._reminder_heap_changed.set()
+        if self._scheduler is None or self._scheduler.done():
+            self._scheduler = asyncio.create_task(self.send_reminders())
+        if not self.save_reminders.is_running():
+            self.save_reminders.start()
 
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.Guild):
@@ -158,93 +495,238 @@ class Reminders(commands.Cog, name="Reminders"):
     @app_commands.command()
     @app_commands.rename(reminder_str="message")
     @app_commands.guild_only()
-    async def remindme(self, interaction: discord.Interaction, reminder_str: str, days: int=0, hours: int=0, minutes: int=0, seconds: int=0):
+    @app_commands.describe(repeat="Send the reminder again on a schedule, e.g. \"daily\", \"weekly\", \"every 3 days\" or \"mon,wed,fri\"")
+    async def remindme(self, interaction: discord.Interaction, reminder_str: str, days: int=0, hours: int=0, minutes: int=0, seconds: int=0, repeat: str | None = None):
         """Set a scheduled reminder. JENOVA will ping you once the time has passed."""
         # Calculate the time when the reminder should be sent at, and create a new reminder object with that timestamp
         timedelta = datetime.timedelta(days=days, hours=hours, minutes=minutes, seconds=seconds)
         reminder_datetime = datetime.datetime.now() + timedelta
         if reminder_datetime <= datetime.datetime.now():
             return await interaction.response.send_message("Reminders cannot be set for the past.", ephemeral=True)
+        try:
+            recurrence = None if repeat is None else Recurrence.parse(repeat)
+        except ValueError as error:
+            return await interaction.response.send_message(str(error), ephemeral=True)
 
         embed = RandomColorEmbed(title="Reminder")
         embed.description = f"You set a reminder for {format_dt(reminder_datetime, style='f')}:\n\"{reminder_str}\""
+        if recurrence is not None:
+            embed.description += f"\nThis reminder repeats {recurrence}."
         view = ReminderSubscribeView(None)
         await interaction.response.send_message(embed=embed, view=view)
-        reminder = await self.create_reminder(interaction, reminder_datetime, reminder_str)
+        reminder = await self.create_reminder(interaction, reminder_datetime, reminder_str, recurrence)
         view.reminder = reminder
         self.bot.add_view(view=view, message_id=reminder.slash_message.id)
 
-    async def create_reminder(self, interaction: discord.Interaction, time: datetime.datetime, reminder_str: str):
+    async def create_reminder(self, interaction: discord.Interaction, time: datetime.datetime, reminder_str: str, recurrence: Recurrence | None = None):
         "Creates a new reminder and adds it to the list of reminders."
         message = await interaction.original_response()
-        reminder = Reminder(interaction.user, interaction.channel, None, datetime.datetime.now(), time, reminder_str, message, [])
-        if interaction.guild.id not in self.reminders:
-            self.reminders[interaction.guild.id] = set()
-        self.reminders[interaction.guild.id].add(reminder)
+        reminder = Reminder(interaction.user, interaction.channel, None, datetime.datetime.now(), time, reminder_str, message, [], recurrence)
+        self.add_reminder(interaction.guild.id, reminder)
 
         return reminder
 
+    def add_reminder(self, guild_id: int, reminder: Reminder):
+        """Adds a reminder to the list of reminders and schedules it to be sent."""
+        if guild_id not in self.reminders:
+            self.reminders[guild_id] = GuildReminders()
+        self.reminders[guild_id].add(reminder)
+        self.mark_unsaved(guild_id, reminder)
+        heapq.heappush(self._reminder_heap, (reminder.reminder_datetime.timestamp(), reminder.id, guild_id, reminder))
+        self._reminder_heap_changed.set()
+
+    def remove_reminder(self, guild_id: int, reminder: Reminder):
+        """Removes a reminder from the list of reminders, if it is still there."""
+        self.reminders[guild_id].discard(reminder)
+        self.mark_unsaved(guild_id, reminder, removed=True)
+
+    def cancel_reminders(self, guild_id: int, reminders: set[Reminder]):
+        """Removes reminders from the list of reminders so that they will not be sent."""
+        for reminder in reminders:
+            self.remove_reminder(guild_id, reminder)
+        # Cancelled reminders are left in the heap, and skipped once they reach the front of it
+        self._reminder_heap_changed.set()
+
+    def subscribe_to_reminder(self, guild_id: int, reminder: Reminder, user: discord.User):
+        """Adds a user to the users who will be pinged by a reminder."""
+        self.reminders[guild_id].subscribe(reminder, user)
+        self.mark_unsaved(guild_id, reminder)
+
+    def unsubscribe_from_reminder(self, guild_id: int, reminder: Reminder, user: discord.User):
+        """Removes a user from the users who will be pinged by a reminder."""
+        self.reminders[guild_id].unsubscribe(reminder, user)
+        self.mark_unsaved(guild_id, reminder)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        """Subscribe users who react with 👍 to the command message of a reminder created with a regular command."""
+        reminder = self.get_reaction_reminder(payload)
+        if reminder is None or payload.user_id == self.bot.user.id:
+            return
+        if all(subscriber.id != payload.user_id for subscriber in reminder.subscribers):
+            user = payload.member if payload.member is not None else await resolve_user(self.bot, payload.user_id)
+            if user is not None:
+                self.subscribe_to_reminder(payload.guild_id, reminder, user)
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        """Unsubscribe users who remove their 👍 reaction from the command message of a reminder created with a regular command."""
+        reminder = self.get_reaction_reminder(payload)
+        if reminder is None:
+            return
+        subscriber = next((subscriber for subscriber in reminder.subscribers if subscriber.id == payload.user_id), None)
+        if subscriber is not None:
+            self.unsubscribe_from_reminder(payload.guild_id, reminder, subscriber)
+
+    def get_reaction_reminder(self, payload: discord.RawReactionActionEvent) -> Reminder | None:
+        """Returns the reminder created with a regular command whose command message was reacted to with 👍, if there is one."""
+        if payload.guild_id is None or str(payload.emoji) != "👍" or payload.guild_id not in self.reminders:
+            return None
+        reminder = self.reminders[payload.guild_id].get(payload.message_id)
+        if reminder is None or reminder.command_message is None: # Reminders created via slash command are subscribed to with a button instead
+            return None
+        return reminder
+
+    def mark_unsaved(self, guild_id: int, reminder: Reminder, *, removed: bool = False):
+        """Records that a reminder was changed or removed, so that it is saved on the next save."""
+        self._unsaved_reminders.setdefault(guild_id, {})[reminder.id] = None if removed else reminder
+
     @app_commands.command()
     @app_commands.guild_only()
     @app_commands.describe(only_reminders_for_me="Only show reminders that will ping you")
     async def reminders(self, interaction: discord.Interaction, only_reminders_for_me: bool | None = None):
         """View scheduled reminders in this server.""" 
 
-        reminders = sorted(self.reminders[interaction.guild.id], key=lambda r: r.reminder_datetime.timestamp())
-        reminders = {reminder for reminder in reminders if reminder.is_viewable(interaction.user)}
-        if only_reminders_for_me:
-            reminders = {reminder for reminder in reminders if reminder.user_will_be_reminded(interaction.user)}
+        sorted_reminders = self.reminders.get(interaction.guild.id, GuildReminders()).viewable_by(interaction.user, bool(only_reminders_for_me))
+        if len(sorted_reminders) == 0:
+            return await interaction.response.send_message("No reminders currently set.", ephemeral=True)
 
-        sorted_reminders = sorted(reminders, key=lambda r: r.reminder_datetime.timestamp())
-        reminder_list = RandomColorEmbed(title="Scheduled Reminders", description='\n'.join([f"{i+1}. {reminder}" for i, reminder in enumerate(sorted_reminders)]))
-        await interaction.response.send_message(embed=reminder_list, ephemeral=True)
+        view = ReminderListView(interaction.user, sorted_reminders)
+        if view.page_count == 1:
+            return await interaction.response.send_message(**view.render(), ephemeral=True)
+        await interaction.response.send_message(**view.render(), view=view, ephemeral=True)
 
     @app_commands.command()
     @app_commands.guild_only()
     async def remindcancel(self, interaction: discord.Interaction):
         """Cancel scheduled reminders."""
-        filtered_reminders = {reminder for reminder in self.reminders[interaction.guild.id] if reminder.is_viewable(interaction.user)}
+        filtered_reminders = self.reminders.get(interaction.guild.id, GuildReminders()).viewable_by(interaction.user)
         
         if len(filtered_reminders) == 0:
             return await interaction.response.send_message("No reminders currently set.", ephemeral=True)
 
-        await interaction.response.send_message(view=ReminderCancelView(interaction, filtered_reminders), ephemeral=True)
+        view = ReminderCancelView(interaction.user, filtered_reminders)
+        await interaction.response.send_message(**view.render(), view=view, ephemeral=True)
 
-    @tasks.loop(seconds=0.2)
-    async def send_reminders(self):
-        """Send any reminders past their scheduled date."""
-        for guild in self.bot.guilds:
-            reminders = self.reminders[guild.id].copy()
+    def catch_up_on_overdue_reminders(self):
+        """Send the reminders that became due while the bot was offline, combined into as few messages as possible per channel,
+        rather than as one reply each."""
+        now = datetime.datetime.now().timestamp()
+        overdue_reminders: dict[int, list[tuple[int, Reminder]]] = {} # Channel ID to (guild ID, reminder)
+        for guild_id, reminders in self.reminders.items():
             for reminder in reminders:
-                if reminder.reminder_datetime.timestamp() <= datetime.datetime.now().timestamp():
-                    # Read the list of reactions to the message, and create a string to mention each user (besides the bot) who reacted
-                    if reminder.command_message is None: # This reminder was created via slash command
-                        message = reminder.slash_message
-                        subscribers_mention = " ".join(user.mention for user in reminder.subscribers if user != self.bot.user and user != reminder.author)
-                    else: # This reminder was created via regular command
-                        message = reminder.command_message
-                        subscribers_mention = ""
-                        for reaction in reminder.command_message.reactions:
-                            if reaction.emoji == "👍":
-                                subscribers = [user async for user in reaction.users()]
-                                subscribers_mention = " ".join(user.mention for user in subscribers if user != self.bot.user and user != reminder.command_message.author)
-                    await message.reply(f"**Reminder** from {format_dt(reminder.original_message_datetime, 'R')}\n\"{reminder.reminder_str}\"\n{reminder.author.mention} {subscribers_mention}")
-
-                    # Remove the reminder from memory
-                    self.reminders[guild.id].remove(reminder)
-                    view = ReminderSubscribeView(None)
-                    self.bot.add_view(view=view, message_id=reminder.slash_message.id)
-    
-    @tasks.loop(seconds=0.3)
-    async def sync_json(self):
-        """Sync with the JSON file if any changes are detected."""
-        for guild in self.bot.guilds:
-            if self.reminders[guild.id] != self._cached_reminders[guild.id]:
-                write_json(guild.id, "reminders", value=[reminder.to_json() for reminder in self.reminders[guild.id]])
-                self._cached_reminders[guild.id] = deepcopy(self.reminders[guild.id])
+                if reminder.reminder_datetime.timestamp() <= now:
+                    overdue_reminders.setdefault(reminder.channel.id, []).append((guild_id, reminder))
+
+        for channel_id, channel_reminders in overdue_reminders.items():
+            channel_reminders.sort(key=lambda guild_reminder: guild_reminder[1].reminder_datetime)
+            lines = []
+            for guild_id, reminder in channel_reminders:
+                subscribers_mention = " ".join(user.mention for user in reminder.subscribers if user != self.bot.user and user != reminder.author)
+                line = f"**Reminder** from {format_dt(reminder.original_message_datetime, 'R')} ({reminder.message.jump_url})\n\"{reminder.reminder_str}\"\n{reminder.author.mention} {subscribers_mention}"
+                lines.append(line[:MAX_MESSAGE_LENGTH])
+                self.finish_reminder(guild_id, reminder)
+
+            channel = channel_reminders[0][1].channel
+            for content in combine_lines(["**These reminders were due while JENOVA was offline:**", *lines], separator="\n\n"):
+                self.dispatcher.dispatch(channel_id, functools.partial(channel.send, content))
 
-def deepcopy(reminders: set[Reminder]) -> set[Reminder]:
-    copied_reminders = set()
-    for reminder in reminders:
-        copied_reminders.add(reminder.copy())
-    return copied_reminders
\ No newline at end of file
+    async def send_reminders(self):
+        """Send each reminder once its scheduled date has passed.
+        Sleeps until the earliest scheduled reminder is due, waking early if a reminder is added or cancelled.
+        Due reminders are handed to the dispatcher, so reminders in different channels are sent concurrently."""
+        while True:
+            self._reminder_heap_changed.clear()
+            while len(self._reminder_heap) > 0:
+                timestamp, _, guild_id, reminder = self._reminder_heap[0]
+                if reminder not in self.reminders.get(guild_id, ()): # This reminder was cancelled or already sent
+                    heapq.heappop(self._reminder_heap)
+                elif timestamp <= datetime.datetime.now().timestamp():
+                    heapq.heappop(self._reminder_heap)
+                    self.dispatcher.dispatch(reminder.channel.id, functools.partial(self.send_reminder, guild_id, reminder), on_failure=functools.partial(self.skip_reminder, guild_id, reminder))
+                else:
+                    break
+
+            time_until_next_reminder = None if len(self._reminder_heap) == 0 else self._reminder_heap[0][0] - datetime.datetime.now().timestamp()
+            try:
+                await asyncio.wait_for(self._reminder_heap_changed.wait(), timeout=time_until_next_reminder)
+            except asyncio.TimeoutError:
+                pass
+
+    async def send_reminder(self, guild_id: int, reminder: Reminder):
+        """Send a reminder and remove it from memory."""
+        if reminder not in self.reminders.get(guild_id, ()): # This reminder was cancelled while waiting to be sent
+            return
+        # Subscribers of reminders created via regular command are kept up to date from the command message's 👍 reactions as they happen
+        subscribers_mention = " ".join(user.mention for user in reminder.subscribers if user != self.bot.user and user != reminder.author)
+        # If the message that created the reminder was deleted, the reminder is still sent, just not as a reply
+        reference = reminder.message.to_reference(fail_if_not_exists=False)
+        await reminder.channel.send(f"**Reminder** from {format_dt(reminder.original_message_datetime, 'R')}\n\"{reminder.reminder_str}\"\n{reminder.author.mention} {subscribers_mention}", reference=reference)
+        self.finish_reminder(guild_id, reminder)
+
+    def skip_reminder(self, guild_id: int, reminder: Reminder):
+        """Called when a reminder could not be sent. A recurring reminder skips to its next occurrence, rather than the whole series being removed."""
+        if reminder.recurrence is None:
+            self.remove_reminder(guild_id, reminder)
+        elif reminder in self.reminders.get(guild_id, ()): # Only if it was not cancelled or already rescheduled
+            self.finish_reminder(guild_id, reminder)
+
+    def finish_reminder(self, guild_id: int, reminder: Reminder):
+        """Once a reminder has been sent, schedule its next occurrence if it repeats, or otherwise remove it from memory."""
+        if reminder.recurrence is not None:
+            # The next occurrence keeps the same ID, so it replaces this one wherever it is stored
+            next_reminder_datetime = reminder.recurrence.next_after(reminder.reminder_datetime, datetime.datetime.now())
+            self.add_reminder(guild_id, dataclasses.replace(reminder, reminder_datetime=next_reminder_datetime))
+            return
+
+        self.remove_reminder(guild_id, reminder)
+        if reminder.slash_message is not None:
+            view = ReminderSubscribeView(None)
+            self.bot.add_view(view=view, message_id=reminder.slash_message.id)
+    
+    async def cog_unload(self):
+        """Stops the reminder loops and saves any changes they have not saved yet. 
+        This runs when the bot closes, before jenovabot.py flushes ioutils."""
+        self.save_reminders.cancel()
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+        self.save_unsaved_reminders()
+
+    @tasks.loop(seconds=1)
+    async def save_reminders(self):
+        """Save the reminders that have changed since the last save."""
+        self.save_unsaved_reminders()
+
+    def save_unsaved_reminders(self):
+        """Writes the reminders that have changed since the last save to the stored data."""
+        # Each guild's changes are saved together, so the JSON backend rewrites the file once per guild rather than once per reminder
+        for guild_id, unsaved_reminders in self._unsaved_reminders.items():
+            write_json_entries(guild_id, "reminders", entries={reminder_id: None if reminder is None else reminder.to_json() for reminder_id, reminder in unsaved_reminders.items()})
+        self._unsaved_reminders = {}
+
+def combine_lines(lines: list[str], separator: str = "\n") -> list[str]:
+    """Joins lines into as few messages as possible, without any message going over Discord's message length limit."""
+    messages = []
+    for line in lines:
+        if len(messages) > 0 and len(messages[-1]) + len(separator) + len(line) <= MAX_MESSAGE_LENGTH:
+            messages[-1] += separator + line
+        else:
+            messages.append(line)
+    return messages
+
+def limit_lines(lines: list[str], max_length: int) -> str:
+    """Joins lines with newlines, shortening each line by the same amount if needed to keep the result within max_length."""
+    if len(lines) == 0:
+        return ""
+    max_line_length = (max_length - len(lines) + 1) // len(lines)
+    return "\n".join(line if len(line) <= max_line_length else line[:max_line_length-3] + "..." for line in lines)
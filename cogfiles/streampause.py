@@ -1,3 +1,5 @@
+import asyncio
+from dataclasses import dataclass, field
 from ioutils import RandomColorEmbed
 
 import discord
@@ -5,23 +7,87 @@ from discord import app_commands
 from discord.ext import commands
 
 
+RENDER_DELAY_SECONDS = 2 # Changes made within this many seconds of each other are shown in a single edit of the streampause message
+
+
+@dataclass
+class StreamPauseSession:
+    """A streampause in progress in one server, for the members of one voice channel.
+    The members in the channel and the members who are back are tracked as they change, 
+    along with a count of the members in the channel who are back, so checking whether everyone is back takes constant time."""
+    message: discord.Message
+    author: discord.Member
+    embed: discord.Embed
+    voice_channel: discord.VoiceChannel
+    present_members: dict[int, discord.Member] = field(default_factory=dict) # Member ID to each non-bot member in the voice channel
+    reacted_user_ids: set[int] = field(default_factory=set) # IDs of the users who have clicked that they are back, whether or not they are in the voice channel
+    present_reacted_count: int = 0 # How many of the members in the voice channel have clicked that they are back
+    rendered_description: str | None = None # The description the message was last edited to show
+    render_task: asyncio.Task | None = None # The pending edit of the message, if there is one
+    needs_render: bool = False # Whether something changed since the message was last rendered
+
+    def __post_init__(self):
+        for member in self.voice_channel.members:
+            self.join(member)
+
+    @property
+    def everyone_is_back(self) -> bool:
+        return self.present_reacted_count == len(self.present_members)
+
+    def join(self, member: discord.Member):
+        """Records that a member joined the voice channel."""
+        if member.bot or member.id in self.present_members:
+            return
+        self.present_members[member.id] = member
+        if member.id in self.reacted_user_ids:
+            self.present_reacted_count += 1
+
+    def leave(self, member: discord.Member):
+        """Records that a member left the voice channel."""
+        if self.present_members.pop(member.id, None) is not None and member.id in self.reacted_user_ids:
+            self.present_reacted_count -= 1
+
+    def mark_back(self, user: discord.Member) -> bool:
+        """Records that a user clicked that they are back. Returns false if they already had."""
+        if user.id in self.reacted_user_ids:
+            return False
+        self.reacted_user_ids.add(user.id)
+        if user.id in self.present_members:
+            self.present_reacted_count += 1
+        return True
+
+    def mark_not_back(self, user: discord.Member) -> bool:
+        """Records that a user clicked that they are not back. Returns false if they had not clicked that they were back."""
+        if user.id not in self.reacted_user_ids:
+            return False
+        self.reacted_user_ids.discard(user.id)
+        if user.id in self.present_members:
+            self.present_reacted_count -= 1
+        return True
+
 class StreamPause(commands.Cog, name="Stream Pause"):
     """Set up a message to react to when taking a break during a stream."""
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.streampause_data: dict[str, discord.Message | discord.Member | set[discord.Member]] = None
+        self.sessions: dict[int, StreamPauseSession] = {} # Guild ID to the streampause in progress in that server
 
     @commands.Cog.listener()
     async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-        """Keep track of members entering or leaving a voice channel during a streampause, if there is one."""       
-        if self.streampause_data is not None:
-            voice_channel = before.channel if after.channel is None else after.channel if before.channel is None else None
-
-            # Fetching the message again to get the most updated state of the message
-            await self.streampause_data["message"].fetch()
+        """Keep track of members entering or leaving the voice channel of this server's streampause, if there is one."""       
+        session = self.sessions.get(member.guild.id)
+        if session is None or member.bot:
+            return
+        was_in_channel = before.channel is not None and before.channel.id == session.voice_channel.id
+        is_in_channel = after.channel is not None and after.channel.id == session.voice_channel.id
+        if was_in_channel == is_in_channel: # This update did not involve the streampause's voice channel, or was only a mute, deafen, etc.
+            return
 
-            await self.attempt_to_finish_streampause(member, voice_channel)
+        if is_in_channel:
+            session.join(member)
+        else:
+            session.leave(member)
+        await self.attempt_to_finish_streampause(session)
 
     @app_commands.command()
     @app_commands.guild_only()
@@ -31,9 +97,8 @@ class StreamPause(commands.Cog, name="Stream Pause"):
         if interaction.user.voice is None:
             return await interaction.response.send_message("This command is only usable inside a voice channel.", ephemeral=True)
 
-        if self.streampause_data is not None:
-            await self.streampause_data["message"].delete()
-            self.streampause_data = None
+        if interaction.guild.id in self.sessions:
+            await self.end_streampause(self.sessions[interaction.guild.id])
 
         embed = RandomColorEmbed(
             title = "Click the button when you're all set!"
@@ -44,58 +109,73 @@ class StreamPause(commands.Cog, name="Stream Pause"):
         message = await interaction.original_response()
         self.bot.add_view(view, message_id=message.id)
 
-        self.streampause_data = {
-            "message": message,
-            "author": interaction.user,
-            "reacted_users": set()
-        }
+        session = StreamPauseSession(message, interaction.user, embed, interaction.user.voice.channel)
+        self.sessions[interaction.guild.id] = session
         
         try:
             await message.pin()
         except Exception:
             pass
 
-        await self.update_message(message, interaction.user.voice.channel)
+        await self.render(session)
 
-    async def attempt_to_finish_streampause(self, user: discord.Member, voice_channel: discord.VoiceChannel | None):
+    async def attempt_to_finish_streampause(self, session: StreamPauseSession):
         """Attempt to end a streampause upon a change to either reactions or voice channel members."""
-        if user.bot or voice_channel is None:
-            return
-
-        message = self.streampause_data["message"]
-        await self.update_message(message, voice_channel)
-
-        vc_members = StreamPause.get_non_bot_users(voice_channel)
-
-        if self.streampause_data["reacted_users"] & vc_members == vc_members:
-            original_author = self.streampause_data["author"]
-            await message.channel.send(f"{original_author.mention} Everyone's here!")
-
-            await message.delete()
-            self.streampause_data = None
-
-    async def update_message(self, message: discord.Message, voice_channel: discord.VoiceChannel | None):
-        """Check the reacted status of each member in the voice channel and update the streampause message to reflect the status."""
-        if voice_channel is None:
-            return
+        if session.everyone_is_back:
+            await session.message.channel.send(f"{session.author.mention} Everyone's here!")
+            await self.end_streampause(session)
+        else:
+            self.request_render(session)
+
+    async def end_streampause(self, session: StreamPauseSession):
+        """Delete the streampause message and forget the streampause."""
+        if self.sessions.get(session.message.guild.id) is session:
+            del self.sessions[session.message.guild.id]
+        if session.render_task is not None:
+            session.render_task.cancel()
+        try:
+            await session.message.delete()
+        except discord.errors.NotFound:
+            pass
 
+    def request_render(self, session: StreamPauseSession):
+        """Schedule the streampause message to be updated. 
+        Requests made while an update is already waiting are merged into it, so a burst of changes causes at most one edit."""
+        session.needs_render = True
+        if session.render_task is None or session.render_task.done():
+            session.render_task = asyncio.create_task(self.render_after_delay(session))
+
+    async def render_after_delay(self, session: StreamPauseSession):
+        """Render the message after a delay, and again after each delay for as long as changes keep being requested, 
+        including changes requested while an edit was in progress."""
+        while session.needs_render:
+            await asyncio.sleep(RENDER_DELAY_SECONDS)
+            if self.sessions.get(session.message.guild.id) is not session: # The streampause may have ended while waiting
+                return
+            session.needs_render = False
+            await self.render(session)
+
+    async def render(self, session: StreamPauseSession):
+        """Check the reacted status of each member in the voice channel and update the streampause message to reflect the status.
+        The message is not edited if its contents would not change."""
         reacted_members = "**Back:**"
         not_reacted_members = "**Not Back:**"
 
-        vc_members = StreamPause.get_non_bot_users(voice_channel)
-
-        for member in vc_members:
-            if member in self.streampause_data["reacted_users"]:
+        for member in session.present_members.values():
+            if member.id in session.reacted_user_ids:
                 reacted_members += f"\n{member.mention}"
             else:
                 not_reacted_members += f"\n{member.mention}"
 
-        embed = RandomColorEmbed(title=message.embeds[0].title, colour=message.embeds[0].colour, description=f"{reacted_members}\n\n{not_reacted_members}")
-        await message.edit(embed=embed)
-
-    @staticmethod
-    def get_non_bot_users(voice_channel: discord.VoiceChannel) -> set[discord.Member]:
-        return set(member for member in voice_channel.members if not member.bot)
+        description = f"{reacted_members}\n\n{not_reacted_members}"
+        if description == session.rendered_description:
+            return
+        session.rendered_description = description
+        session.embed.description = description
+        try:
+            await session.message.edit(embed=session.embed)
+        except discord.errors.NotFound: # The message was deleted by someone else
+            pass
 
 class StreamPauseView(discord.ui.View):
 
@@ -103,29 +183,39 @@ class StreamPauseView(discord.ui.View):
         super().__init__(timeout=None)
         self.streampause = streampause
 
+    async def interaction_check(self, interaction: discord.Interaction):
+        """Checks whether the callback should be processed."""
+        if interaction.data.get("custom_id") == "What is this?":
+            return True
+        session = self.streampause.sessions.get(interaction.guild_id)
+        if session is None or session.message.id != interaction.message.id:
+            await interaction.response.send_message("This streampause has already ended.", ephemeral=True)
+            return False
+        return True
+
     @discord.ui.button(label="I'm back!", custom_id="I'm back!", emoji="👍", style=discord.ButtonStyle.blurple)
     async def return_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user not in self.streampause.streampause_data["reacted_users"]:
-            self.streampause.streampause_data["reacted_users"].add(interaction.user)
-            await self.streampause.attempt_to_finish_streampause(interaction.user, interaction.user.voice.channel)
+        session = self.streampause.sessions[interaction.guild_id]
+        if session.mark_back(interaction.user):
             await interaction.response.send_message("Welcome back!", ephemeral=True)
+            await self.streampause.attempt_to_finish_streampause(session)
         else:
             await interaction.response.defer()
 
     @discord.ui.button(label="I'm not back!", custom_id="I'm not back!", emoji="👎", style=discord.ButtonStyle.blurple)
     async def unreturn_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user in self.streampause.streampause_data["reacted_users"]:
-            self.streampause.streampause_data["reacted_users"].discard(interaction.user)
-            await self.streampause.attempt_to_finish_streampause(interaction.user, interaction.user.voice.channel)
+        session = self.streampause.sessions[interaction.guild_id]
+        if session.mark_not_back(interaction.user):
             await interaction.response.send_message("Come back soon!", ephemeral=True)
+            await self.streampause.attempt_to_finish_streampause(session)
         else:
             await interaction.response.defer()
 
     @discord.ui.button(label="Cancel", custom_id="Cancel", style=discord.ButtonStyle.red)
     async def cancel_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user == self.streampause.streampause_data["author"]:
-            await self.streampause.streampause_data["message"].delete()
-            self.streampause.streampause_data = None
+        session = self.streampause.sessions[interaction.guild_id]
+        if interaction.user == session.author:
+            await self.streampause.end_streampause(session)
             await interaction.response.send_message("Streampause cancelled.")
         else:
             await interaction.response.defer()
@@ -135,4 +225,4 @@ class StreamPauseView(discord.ui.View):
         await interaction.response.send_message("This command is for when we want to take a break during a stream. " +
                                                 "Take an AFK break, and when you come back, click the 👍 button. " +
                                                 "When everyone has come back and clicked, the message will delete itself " +
-                                                "and the person who used the command will be pinged.", ephemeral=True)        
\ No newline at end of file
+                                                "and the person who used the command will be pinged.", ephemeral=True)
\ No newline at end of file
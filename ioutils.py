@@ -1,11 +1,21 @@
-import json, os
+import asyncio, json, os, time
 from abc import ABC, abstractmethod
 from discord import Embed, Color
 import discord
 from discord.ext import commands
+from storage import StorageBackend, JsonFileBackend, JournalBackend, ShardedJsonBackend, SqliteBackend, set_entry
 
 
 DATA_FILE = os.getenv("DATA_FILE")
+DATA_BACKEND = os.getenv("DATA_BACKEND", "json") # "json" stores everything in DATA_FILE, "journal" stores DATA_FILE plus a log of changes, "sharded" stores one file per guild in DATA_DIR, "sqlite" stores it in DATABASE_FILE
+DATA_DIR = os.getenv("DATA_DIR", None if DATA_FILE is None else os.path.dirname(DATA_FILE))
+DATABASE_FILE = os.getenv("DATABASE_FILE", None if DATA_FILE is None else os.path.splitext(DATA_FILE)[0] + ".db")
+DATA_WRITE_DELAY = float(os.getenv("DATA_WRITE_DELAY", 0)) # Seconds to coalesce writes over before saving them, 0 saves every write immediately
+INITIALIZE_CONCURRENCY = int(os.getenv("INITIALIZE_CONCURRENCY", 10)) # Maximum number of objects deserialized at once on startup
+JOURNAL_COMPACT_SIZE = int(os.getenv("JOURNAL_COMPACT_SIZE", 1_000_000)) # Size in bytes the journal's log can reach before it is folded into DATA_FILE
+
+_backend: StorageBackend | None = None
+_document: dict | None = None # In-memory copy of the stored data, loaded on first access
 
 
 class JsonSerializable(ABC):
@@ -22,11 +32,34 @@ class RandomColorEmbed(Embed):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, color=Color.random(), **kwargs)
 
+def get_backend() -> StorageBackend:
+    """Returns the storage backend selected by DATA_BACKEND, creating it the first time it is needed."""
+    global _backend
+    if _backend is None:
+        if DATA_BACKEND == "sqlite":
+            # The first time the database is created, it is filled in from the existing JSON data file
+            _backend = SqliteBackend(DATABASE_FILE, migrate_from=DATA_FILE)
+        elif DATA_BACKEND == "journal":
+            # The existing JSON data file serves as the journal's first snapshot
+            _backend = JournalBackend(DATA_FILE, compact_size=JOURNAL_COMPACT_SIZE)
+        elif DATA_BACKEND == "sharded":
+            # The first time the directory is used, the existing JSON data file is split into a file per guild
+            _backend = ShardedJsonBackend(DATA_DIR, write_delay=DATA_WRITE_DELAY, migrate_from=DATA_FILE)
+        else:
+            _backend = JsonFileBackend(DATA_FILE, write_delay=DATA_WRITE_DELAY)
+    return _backend
+
+def load_document() -> dict:
+    """Returns the in-memory copy of the stored data, reading it from the backend the first time it is needed."""
+    global _document
+    if _document is None:
+        _document = get_backend().load()
+    return _document
+
 def read_json(*path: list[str | int]):
-    """Read JSON object data from a file."""
-    
-    with open(DATA_FILE, "r") as file:
-        position = json.load(file)
+    """Read JSON object data from the in-memory copy of the stored data.
+    The returned object is shared with the cache, so it should not be mutated in place."""
+    position = load_document()
     for key in path:
         if key is None or position is None:
             return None
@@ -34,33 +67,69 @@ def read_json(*path: list[str | int]):
     return position
 
 def write_json(*path: any, value: any):
-    """Writes JSON object data to a file."""
-
-    with open(DATA_FILE, "r+") as file:
-        file_json = json.load(file)
-        position = file_json
-        for key in path:
-            if position.get(str(key)) is None:
-                position[str(key)] = dict()
-            previous_position = position
-            position = position.get(str(key))
-
-        previous_position[str(key)] = value
-        file.seek(0)
-        json.dump(file_json, file, indent=2)
-        file.truncate()
+    """Writes JSON object data to the in-memory copy of the stored data, then saves it through the storage backend.
+    With the JSON backend, if DATA_WRITE_DELAY is set, writes made within that many seconds of each other are saved together."""
+    file_json = load_document()
+    position = file_json
+    for key in path:
+        if position.get(str(key)) is None:
+            position[str(key)] = dict()
+        previous_position = position
+        position = position.get(str(key))
+
+    previous_position[str(key)] = value
+    get_backend().save(file_json, tuple(str(key) for key in path), value)
+
+def write_json_entry(*path: any, id: any, value: dict | None):
+    """Replaces a single entry of the JSON list at the given path, matched by the collection's ID field (see storage.ENTRY_ID_FIELDS).
+    The entry is added if no entry has that ID, and removed if value is None.
+    Backends that support it only save that one entry, rather than the whole collection."""
+    path = tuple(str(key) for key in path)
+    document = load_document()
+    set_entry(document, path, str(id), value)
+    get_backend().save_entry(document, path, str(id), value)
+
+def write_json_entries(*path: any, entries: dict[any, dict | None]):
+    """Replaces several entries of the JSON list at the given path, as write_json_entry does, but saves them all at once.
+    Backends that rewrite a whole file on each save only rewrite it once, rather than once per entry."""
+    if len(entries) == 0:
+        return
+    path = tuple(str(key) for key in path)
+    entries = {str(id): value for id, value in entries.items()}
+    document = load_document()
+    for id, value in entries.items():
+        set_entry(document, path, id, value)
+    get_backend().save_entries(document, path, entries)
+
+def flush():
+    """Immediately saves any changes still waiting in the write window. Call this before shutting down."""
+    if _backend is not None:
+        _backend.flush()
 
 async def initialize_from_json(bot: commands.Bot, settings_class: JsonSerializable, guild_settings: dict[int, set[JsonSerializable]], key: str):
     """Initializes a dictionary mapping guild ID to a set of JSON-serializable objects 
-    by reading the JSON file and deserializing the objects."""
+    by reading the JSON file and deserializing the objects.
+    Objects across all guilds are deserialized concurrently, at most INITIALIZE_CONCURRENCY at a time."""
+    start_time = time.perf_counter()
+    semaphore = asyncio.Semaphore(INITIALIZE_CONCURRENCY)
 
-    for guild in bot.guilds:
+    async def deserialize(json_obj: dict):
+        """Deserializes one object, returning None if it could not be deserialized."""
+        async with semaphore:
+            try:
+                return await settings_class.from_json(bot, json_obj)
+            except json.JSONDecodeError as e:
+                print(e)
+            except discord.errors.Forbidden as e:
+                print(e)
+
+    async def initialize_guild(guild: discord.Guild):
+        """Deserializes every object saved for one guild."""
         if read_json(guild.id, key) is None:
             write_json(guild.id, key, value={})
-        try:
-            guild_settings[guild.id] = {await settings_class.from_json(bot, json_str) for json_str in read_json(guild.id, key)}
-            guild_settings[guild.id] = {setting for setting in guild_settings[guild.id] if setting is not None} # Clean invalid entries before they cause errors later
-        except json.JSONDecodeError as e:
-            print(e)
-        except discord.errors.Forbidden as e:
-            print(e)
\ No newline at end of file
+        settings = await asyncio.gather(*(deserialize(json_obj) for json_obj in read_json(guild.id, key)))
+        guild_settings[guild.id] = {setting for setting in settings if setting is not None} # Clean invalid entries before they cause errors later
+
+    await asyncio.gather(*(initialize_guild(guild) for guild in bot.guilds))
+    count = sum(len(guild_settings.get(guild.id, ())) for guild in bot.guilds)
+    print(f"Initialized {count} {key} across {len(bot.guilds)} guild(s) in {time.perf_counter() - start_time:.2f}s.")
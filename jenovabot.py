@@ -4,6 +4,8 @@ import os
 import discord
 from discord.ext import commands
 
+import ioutils
+
 from cogfiles.copypastas import Copypastas
 from cogfiles.alerts import EventAlerts
 from cogfiles.streampause import StreamPause
@@ -32,6 +34,7 @@ def main():
         asyncio.run(bot.add_cog(cog))
 
     bot.run(token)
+    ioutils.flush() # Save any writes still waiting in the write window before exiting
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
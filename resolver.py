@@ -0,0 +1,75 @@
+import os, time
+from collections import Counter, OrderedDict
+
+import discord
+from discord.ext import commands
+
+
+RESOLVER_CACHE_SIZE = int(os.getenv("RESOLVER_CACHE_SIZE", 2048)) # Maximum number of fetched objects to remember
+RESOLVER_CACHE_TTL = float(os.getenv("RESOLVER_CACHE_TTL", 300)) # Seconds to remember a fetched object (or that it could not be found) for
+
+
+class TTLCache:
+    """A least-recently-used cache whose entries also expire after a fixed number of seconds."""
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[any, tuple[float, any]] = OrderedDict()
+
+    def get(self, key: any) -> tuple[bool, any]:
+        """Returns whether the key is cached, along with its cached value."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expiry_time, value = entry
+        if expiry_time < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def set(self, key: any, value: any):
+        """Caches a value, evicting the least recently used value if the cache is full."""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+
+_cache = TTLCache(RESOLVER_CACHE_SIZE, RESOLVER_CACHE_TTL)
+stats: Counter[str] = Counter() # How many lookups were served by the gateway cache ("gateway_hits"), by this module's cache ("cache_hits"), or over REST ("misses")
+
+
+async def _resolve(key: tuple, get_from_gateway, fetch):
+    """Looks an object up in the gateway cache, then in this module's cache, then over REST.
+    Returns None if the object does not exist or the bot cannot access it, and remembers that result too."""
+    value = get_from_gateway()
+    if value is not None:
+        stats["gateway_hits"] += 1
+        return value
+
+    is_cached, value = _cache.get(key)
+    if is_cached:
+        stats["cache_hits"] += 1
+        return value
+
+    stats["misses"] += 1
+    try:
+        value = await fetch()
+    except (discord.errors.NotFound, discord.errors.Forbidden):
+        value = None
+    _cache.set(key, value)
+    return value
+
+async def resolve_channel(bot: commands.Bot, channel_id: int) -> discord.abc.GuildChannel | discord.Thread | discord.abc.PrivateChannel | None:
+    """Returns the channel or thread with the given ID, or None if it cannot be found."""
+    return await _resolve(("channel", channel_id), lambda: bot.get_channel(channel_id), lambda: bot.fetch_channel(channel_id))
+
+async def resolve_user(bot: commands.Bot, user_id: int) -> discord.User | None:
+    """Returns the user with the given ID, or None if it cannot be found."""
+    return await _resolve(("user", user_id), lambda: bot.get_user(user_id), lambda: bot.fetch_user(user_id))
+
+async def resolve_member(guild: discord.Guild, member_id: int) -> discord.Member | None:
+    """Returns the member of the guild with the given ID, or None if they are not in the guild."""
+    return await _resolve(("member", guild.id, member_id), lambda: guild.get_member(member_id), lambda: guild.fetch_member(member_id))
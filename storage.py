@@ -0,0 +1,447 @@
+import asyncio, json, os, sqlite3, threading
+from abc import ABC, abstractmethod
+
+
+# The field that uniquely identifies an entry within each list-valued collection
+ENTRY_ID_FIELDS = {
+    "reminders": "id",
+    "birthdays": "user_id",
+    "reaction_roles": "role_id"
+}
+
+
+def entry_id(collection: str, entry: dict, index: int) -> str:
+    """Returns the ID of an entry in a collection, falling back to its position if the collection has no ID field."""
+    field = ENTRY_ID_FIELDS.get(collection)
+    if field is None or not isinstance(entry, dict) or entry.get(field) is None:
+        return f"#{index}"
+    return str(entry[field])
+
+def get_path(document: dict, path: tuple[str, ...]):
+    """Returns the value at the given path in the document, or None if it does not exist."""
+    position = document
+    for key in path:
+        if not isinstance(position, dict):
+            return None
+        position = position.get(key)
+    return position
+
+def set_path(document: dict, path: tuple[str, ...], value: any):
+    """Sets the value at the given path in the document, creating any missing objects along the way."""
+    position = document
+    for key in path[:-1]:
+        if not isinstance(position.get(key), dict):
+            position[key] = dict()
+        position = position[key]
+    position[path[-1]] = value
+
+def set_entry(document: dict, path: tuple[str, ...], id: str, value: dict | None):
+    """Replaces the entry with the given ID in the collection at the given path, adding it if it does not exist.
+    If value is None, the entry is removed instead."""
+    collection = get_path(document, path)
+    if not isinstance(collection, list):
+        collection = []
+        set_path(document, path, collection)
+    index = next((i for i, entry in enumerate(collection) if entry_id(path[-1], entry, i) == id), None)
+    if index is not None and value is None:
+        del collection[index]
+    elif index is not None:
+        collection[index] = value
+    elif value is not None:
+        collection.append(value)
+
+
+class StorageBackend(ABC):
+    """Persists the document that ioutils keeps in memory."""
+
+    @abstractmethod
+    def load(self) -> dict:
+        """Reads the whole stored document."""
+        pass
+
+    @abstractmethod
+    def save(self, document: dict, path: tuple[str, ...], value: any):
+        """Persists a write of value at the given path of the (already updated) document."""
+        pass
+
+    def save_entry(self, document: dict, path: tuple[str, ...], id: str, value: dict | None):
+        """Persists the replacement (or removal, if value is None) of a single entry of the collection at the given path.
+        Backends that cannot update a single entry save the whole collection instead."""
+        self.save(document, path, get_path(document, path))
+
+    def save_entries(self, document: dict, path: tuple[str, ...], entries: dict[str, dict | None]):
+        """Persists the replacement (or removal) of several entries of the collection at the given path at once.
+        Backends that cannot update a single entry save the whole collection once, rather than once per entry."""
+        self.save(document, path, get_path(document, path))
+
+    def flush(self):
+        """Saves any changes that are still waiting to be written."""
+        pass
+
+
+class JsonFileBackend(StorageBackend):
+    """Stores the whole document in a single JSON file, rewriting the file on each save.
+    If write_delay is set, saves made within that many seconds of each other are written together."""
+
+    def __init__(self, file_path: str, write_delay: float = 0):
+        self.file_path = file_path
+        self.write_delay = write_delay
+        self._document: dict | None = None
+        self._unsaved_changes = False
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._file_lock = threading.Lock()
+        self._generation = 0
+        self._last_written_generation = 0
+
+    def load(self) -> dict:
+        with open(self.file_path, "r") as file:
+            return json.load(file)
+
+    def save(self, document: dict, path: tuple[str, ...], value: any):
+        self._document = document
+        self._unsaved_changes = True
+        if self.write_delay <= 0:
+            return self.flush()
+        if self._flush_handle is not None: # A save is already pending, so this write will be included in it
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError: # No event loop to defer the save to
+            return self.flush()
+        self._flush_handle = loop.call_later(self.write_delay, self._flush_in_background, loop)
+
+    def flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        contents = self._take_unsaved_contents()
+        if contents is not None:
+            self._write_file(*contents)
+
+    def _flush_in_background(self, loop: asyncio.AbstractEventLoop):
+        """Saves the pending changes, serializing them on the event loop but writing the file from a worker thread."""
+        self._flush_handle = None
+        contents = self._take_unsaved_contents()
+        if contents is not None:
+            write = loop.run_in_executor(None, self._write_file, *contents)
+            write.add_done_callback(self._finish_write)
+
+    def _finish_write(self, write: asyncio.Future):
+        """Reports any error from a background write, and marks its changes as unsaved again,
+        so that the next save or flush() writes them."""
+        if write.exception() is not None:
+            print(f"Failed to write {self.file_path}: {write.exception()}")
+            self._unsaved_changes = True
+
+    def _take_unsaved_contents(self) -> tuple[int, str] | None:
+        """Serializes the document if it has unsaved changes, returning it along with its generation number."""
+        if not self._unsaved_changes:
+            return None
+        self._unsaved_changes = False
+        self._generation += 1
+        return self._generation, json.dumps(self._document, indent=2)
+
+    def _write_file(self, generation: int, contents: str):
+        """Atomically replaces the file with the given contents, unless newer contents have already been written."""
+        with self._file_lock:
+            if generation <= self._last_written_generation:
+                return
+            write_file_atomically(self.file_path, contents)
+            self._last_written_generation = generation
+
+
+class SqliteBackend(StorageBackend):
+    """Stores each guild's settings as their own rows, and each entry of a collection (reminders, birthdays, etc) as its own row.
+    Writing a setting or a single entry only touches the matching row, rather than the whole document."""
+
+    def __init__(self, database_path: str, migrate_from: str | None = None):
+        self.connection = sqlite3.connect(database_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS settings (
+                    guild_id TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (guild_id, key)
+                )""")
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    guild_id TEXT NOT NULL,
+                    collection TEXT NOT NULL,
+                    entry_id TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    PRIMARY KEY (guild_id, collection, entry_id)
+                )""")
+        if migrate_from is not None and os.path.exists(migrate_from) and self.is_empty():
+            self.migrate_from_json(migrate_from)
+
+    def is_empty(self) -> bool:
+        """Returns true if nothing has been stored in the database yet."""
+        return self.connection.execute("SELECT NOT EXISTS (SELECT 1 FROM settings) AND NOT EXISTS (SELECT 1 FROM entries)").fetchone()[0] == 1
+
+    def migrate_from_json(self, file_path: str):
+        """Copies every guild from an existing JSON data file into the database."""
+        with open(file_path, "r") as file:
+            document = json.load(file)
+        with self.connection:
+            for guild_id in document:
+                self._save_guild(document, guild_id)
+        print(f"Migrated {len(document)} guild(s) from {file_path} to SQLite.")
+
+    def load(self) -> dict:
+        document = {}
+        for guild_id, key, value in self.connection.execute("SELECT guild_id, key, value FROM settings"):
+            document.setdefault(guild_id, {})[key] = json.loads(value)
+        for guild_id, collection, value in self.connection.execute("SELECT guild_id, collection, value FROM entries ORDER BY rowid"):
+            guild = document.setdefault(guild_id, {})
+            if not isinstance(guild.get(collection), list):
+                guild[collection] = []
+            guild[collection].append(json.loads(value))
+        return document
+
+    def save(self, document: dict, path: tuple[str, ...], value: any):
+        with self.connection:
+            if len(path) == 1:
+                self._save_guild(document, path[0])
+            else:
+                guild_id, key = path[:2]
+                self._save_key(guild_id, key, get_path(document, (guild_id, key)))
+
+    def save_entry(self, document: dict, path: tuple[str, ...], id: str, value: dict | None):
+        if len(path) != 2:
+            return super().save_entry(document, path, id, value)
+        guild_id, collection = path
+        with self.connection:
+            self._mark_collection(guild_id, collection)
+            if value is None:
+                self.connection.execute("DELETE FROM entries WHERE guild_id = ? AND collection = ? AND entry_id = ?", (guild_id, collection, id))
+            else:
+                self.connection.execute("INSERT OR REPLACE INTO entries (guild_id, collection, entry_id, value) VALUES (?, ?, ?, ?)", (guild_id, collection, id, json.dumps(value)))
+
+    def save_entries(self, document: dict, path: tuple[str, ...], entries: dict[str, dict | None]):
+        if len(path) != 2:
+            return super().save_entries(document, path, entries)
+        guild_id, collection = path
+        with self.connection:
+            self._mark_collection(guild_id, collection)
+            self.connection.executemany("DELETE FROM entries WHERE guild_id = ? AND collection = ? AND entry_id = ?",
+                                        ((guild_id, collection, id) for id, value in entries.items() if value is None))
+            self.connection.executemany("INSERT OR REPLACE INTO entries (guild_id, collection, entry_id, value) VALUES (?, ?, ?, ?)",
+                                        ((guild_id, collection, id, json.dumps(value)) for id, value in entries.items() if value is not None))
+
+    def _save_guild(self, document: dict, guild_id: str):
+        """Replaces every row belonging to a guild with the guild's current settings and collections."""
+        self.connection.execute("DELETE FROM settings WHERE guild_id = ?", (guild_id,))
+        self.connection.execute("DELETE FROM entries WHERE guild_id = ?", (guild_id,))
+        guild = document.get(guild_id)
+        if not isinstance(guild, dict):
+            return
+        for key, value in guild.items():
+            self._save_key(guild_id, key, value)
+
+    def _save_key(self, guild_id: str, key: str, value: any):
+        """Replaces the rows for one of a guild's keys. Lists are stored as one row per entry."""
+        self.connection.execute("DELETE FROM entries WHERE guild_id = ? AND collection = ?", (guild_id, key))
+        if not isinstance(value, list):
+            self.connection.execute("INSERT OR REPLACE INTO settings (guild_id, key, value) VALUES (?, ?, ?)", (guild_id, key, json.dumps(value)))
+            return
+        self._mark_collection(guild_id, key)
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO entries (guild_id, collection, entry_id, value) VALUES (?, ?, ?, ?)",
+            ((guild_id, key, entry_id(key, entry, i), json.dumps(entry)) for i, entry in enumerate(value))
+        )
+
+    def _mark_collection(self, guild_id: str, collection: str):
+        """Records that a guild's key holds a list, so that it loads as an empty list rather than being missing when it has no entries."""
+        self.connection.execute("INSERT OR REPLACE INTO settings (guild_id, key, value) VALUES (?, ?, '[]')", (guild_id, collection))
+
+    def flush(self):
+        self.connection.commit()
+
+
+class JournalBackend(StorageBackend):
+    """Stores the document as a JSON snapshot file plus a log of the changes made since the snapshot, one JSON line per write.
+    Each save only appends the change to the log. Once the log grows past compact_size bytes,
+    it is folded back into the snapshot in the background."""
+
+    def __init__(self, snapshot_path: str, compact_size: int):
+        self.snapshot_path = snapshot_path
+        self.log_path = f"{snapshot_path}.log"
+        self.compacting_log_path = f"{snapshot_path}.log.compacting"
+        self.compact_size = compact_size
+        self._log = None
+        self._compaction: asyncio.Future | None = None
+
+    def load(self) -> dict:
+        document = {}
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as file:
+                document = json.load(file)
+        # A log left over from an interrupted compaction holds changes older than the current log
+        for log_path in (self.compacting_log_path, self.log_path):
+            if os.path.exists(log_path):
+                JournalBackend.replay(document, log_path)
+        self._log = open(self.log_path, "a")
+        if os.path.exists(self.compacting_log_path):
+            self.compact(document)
+        return document
+
+    @staticmethod
+    def replay(document: dict, log_path: str):
+        """Applies every change recorded in a log file to the document, in order."""
+        with open(log_path, "r") as file:
+            for line in file:
+                try:
+                    change = json.loads(line)
+                except json.JSONDecodeError: # The last line may be cut off if the bot stopped partway through writing it
+                    continue
+                if change["op"] == "set":
+                    set_path(document, tuple(change["path"]), change["value"])
+                elif change["op"] == "entry":
+                    set_entry(document, tuple(change["path"]), change["id"], change["value"])
+
+    def save(self, document: dict, path: tuple[str, ...], value: any):
+        self._append(document, {"op": "set", "path": path, "value": value})
+
+    def save_entry(self, document: dict, path: tuple[str, ...], id: str, value: dict | None):
+        self._append(document, {"op": "entry", "path": path, "id": id, "value": value})
+
+    def save_entries(self, document: dict, path: tuple[str, ...], entries: dict[str, dict | None]):
+        for id, value in entries.items():
+            self.save_entry(document, path, id, value)
+
+    def _append(self, document: dict, change: dict):
+        """Appends a change to the log, compacting the log if it has grown too large."""
+        self._log.write(json.dumps(change) + "\n")
+        self._log.flush()
+        if self._log.tell() >= self.compact_size and self._compaction is None:
+            self.compact(document)
+
+    def compact(self, document: dict):
+        """Folds the log into the snapshot. The log is swapped for a new empty one right away, so later changes keep being logged,
+        while the snapshot is written from a worker thread if there is an event loop to run it alongside."""
+        self._log.close()
+        if os.path.exists(self.compacting_log_path):
+            # An earlier compaction did not finish, so its log still holds changes that are not in the snapshot.
+            # Add this log's changes after them, rather than replacing them.
+            with open(self.log_path, "r") as log, open(self.compacting_log_path, "a") as compacting_log:
+                compacting_log.write(log.read())
+                compacting_log.flush()
+                os.fsync(compacting_log.fileno())
+            os.remove(self.log_path)
+        else:
+            os.replace(self.log_path, self.compacting_log_path)
+        self._log = open(self.log_path, "a")
+        contents = json.dumps(document, indent=2)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            try:
+                self._write_snapshot(contents)
+            except OSError as error: # The compacting log is kept, so the next compaction tries again
+                print(f"Failed to compact {self.log_path}: {error}")
+            return
+        self._compaction = loop.run_in_executor(None, self._write_snapshot, contents)
+        self._compaction.add_done_callback(self._finish_compaction)
+
+    def _write_snapshot(self, contents: str):
+        """Replaces the snapshot, then removes the log whose changes it now contains."""
+        write_file_atomically(self.snapshot_path, contents)
+        os.remove(self.compacting_log_path)
+
+    def _finish_compaction(self, compaction: asyncio.Future):
+        """Allows the next compaction to start, reporting any error from this one.
+        If it failed, the compacting log is kept, so the next compaction adds to it and tries again."""
+        self._compaction = None
+        if compaction.exception() is not None:
+            print(f"Failed to compact {self.log_path}: {compaction.exception()}")
+
+    def flush(self):
+        if self._log is not None:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+
+
+class LazyGuildDocument(dict):
+    """A document whose guilds are each loaded with load_guild the first time they are accessed."""
+
+    def __init__(self, load_guild):
+        super().__init__()
+        self._load_guild = load_guild
+        self._attempted_guild_ids: set[str] = set()
+
+    def __missing__(self, guild_id: str):
+        if guild_id in self._attempted_guild_ids: # This guild has nothing saved
+            raise KeyError(guild_id)
+        self._attempted_guild_ids.add(guild_id)
+        guild = self._load_guild(guild_id)
+        if guild is None:
+            raise KeyError(guild_id)
+        self[guild_id] = guild
+        return guild
+
+    def get(self, key: str, default: any = None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class ShardedJsonBackend(StorageBackend):
+    """Stores each guild in its own JSON file (<directory>/<guild_id>.json), loading each file the first time the guild is accessed.
+    A save only rewrites the affected guild's file, and with a write_delay, different guilds' files are written concurrently."""
+
+    def __init__(self, directory: str, write_delay: float = 0, migrate_from: str | None = None):
+        self.directory = directory
+        self.write_delay = write_delay
+        self._shards: dict[str, JsonFileBackend] = {}
+        os.makedirs(directory, exist_ok=True)
+        if migrate_from is not None and os.path.exists(migrate_from) and not any(name.removesuffix(".json").isdigit() for name in os.listdir(directory)):
+            self.migrate_from_json(migrate_from)
+
+    def migrate_from_json(self, file_path: str):
+        """Splits an existing JSON data file into one file per guild."""
+        with open(file_path, "r") as file:
+            document = json.load(file)
+        for guild_id, guild in document.items():
+            write_file_atomically(self._guild_path(guild_id), json.dumps(guild, indent=2))
+        print(f"Migrated {len(document)} guild(s) from {file_path} to {self.directory}.")
+
+    def _guild_path(self, guild_id: str) -> str:
+        return os.path.join(self.directory, f"{guild_id}.json")
+
+    def _shard(self, guild_id: str) -> JsonFileBackend:
+        """Returns the backend that writes a single guild's file."""
+        if guild_id not in self._shards:
+            self._shards[guild_id] = JsonFileBackend(self._guild_path(guild_id), write_delay=self.write_delay)
+        return self._shards[guild_id]
+
+    def _load_guild(self, guild_id: str) -> dict | None:
+        """Reads a single guild's file, returning None if the guild has nothing saved."""
+        guild_path = self._guild_path(guild_id)
+        if not os.path.exists(guild_path):
+            return None
+        return self._shard(guild_id).load()
+
+    def load(self) -> dict:
+        return LazyGuildDocument(self._load_guild)
+
+    def save(self, document: dict, path: tuple[str, ...], value: any):
+        guild_id = path[0]
+        self._shard(guild_id).save(document[guild_id], path[1:], value)
+
+    def flush(self):
+        for shard in self._shards.values():
+            shard.flush()
+
+
+def write_file_atomically(file_path: str, contents: str):
+    """Replaces a file's contents by writing to a temporary file and renaming it, so the file is never left half-written."""
+    temp_file = f"{file_path}.tmp"
+    with open(temp_file, "w") as file:
+        file.write(contents)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_file, file_path)